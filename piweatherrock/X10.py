@@ -1,7 +1,13 @@
 
+import logging
+import os
+import selectors
 import struct
+import threading
 import time
 
+from concurrent.futures import Future
+
 # Header Byte Types
 addr = 0x04
 func = 0x06
@@ -221,3 +227,331 @@ def X10_SetClock( ser ):
         print(f"Expected Checksum: {hex(cs)}")
 
 
+# Bytes the CM11A sends without being asked
+POLL = 0x5A           # It has received something to hand over
+POLL_REPLY = 0xC3     # Sent back to have it hand it over
+CLOCK_REQUEST = 0xA5  # It lost power and wants its clock set
+# Handshake bytes
+ACK = 0x00
+READY = 0x55
+STATUS_REQUEST = 0x8B
+# See X10_SetClock()
+SET_CLOCK = b"\x9b\x32\x66\x07\xf4\x04\x60"
+# Dimming the whole way takes 22 steps
+MAX_DIMS = 22
+# How long to wait for the CM11A to answer, in seconds. Some commands
+# take it up to two.
+REPLY_TIMEOUT = 5
+RETRIES = 3
+
+
+class X10Error(Exception):
+    pass
+
+
+def checksum(packet):
+    return sum(packet) & 0xFF
+
+
+class X10Command:
+    """
+    A command waiting to be sent, along with the futures of everyone who
+    asked for it. kind is 'On', 'Off', 'Bright', 'Dim' or 'Status'. dims
+    is how many steps to brighten by, or dim by if it is negative.
+    """
+
+    __slots__ = ('kind', 'house', 'unit', 'dims', 'futures')
+
+    def __init__(self, kind, house=None, unit=None, dims=0):
+        self.kind = kind
+        self.house = house
+        self.unit = unit
+        self.dims = dims
+        self.futures = [Future()]
+
+    def is_switch(self):
+        return self.kind in ('On', 'Off')
+
+    def is_level(self):
+        return self.kind in ('Bright', 'Dim')
+
+    def packets(self):
+        """
+        Returns the address and function packets that send the command.
+        """
+        if self.is_level():
+            kind = 'Bright' if self.dims > 0 else 'Dim'
+            header = (min(abs(self.dims), MAX_DIMS) << 3) | func
+        else:
+            kind = self.kind
+            header = func
+        return (struct.pack('BB', addr, (self.house << 4) | self.unit),
+                struct.pack('BB', header, (self.house << 4) | funccode[kind]))
+
+
+class X10Controller(threading.Thread):
+    """
+    Drives a CM11A on its own thread so that nothing waiting on the
+    serial port ever holds up the display.
+
+    on(), off(), bright(), dim() and status() queue a command and return
+    a concurrent.futures.Future right away. The future's result is True
+    once a command has been sent, or the 14 status bytes for status().
+    If the CM11A never gets it right, the future raises X10Error.
+
+    Commands still waiting their turn are combined where the end result
+    is the same:
+
+    - Repeating a command, or turning a unit on or off again, replaces
+      the one waiting for that unit.
+    - Off drops the brightness changes waiting for that unit.
+    - Brightening and dimming steps add up into one command. Steps that
+      cancel out aren't sent at all.
+
+    Everyone who asked for a command that was combined gets the result
+    of the command that was sent.
+
+    The CM11A sends 0x5A when it has received something from the power
+    line and 0xA5 when it wants its clock set. The thread waits on the
+    serial port and the queue together, so either is answered as soon as
+    it arrives without polling. Whatever the CM11A hands over is passed
+    to on_receive, if given.
+
+    port is the serial device, such as /dev/ttyUSB0. pyserial is only
+    imported when the thread starts. serial can be an already open port
+    instead.
+    """
+
+    def __init__(self, port=None, on_receive=None, serial=None):
+        super().__init__(name="x10-controller", daemon=True)
+        self.log = logging.getLogger(__name__)
+        self.port_name = port
+        self.serial = serial
+        self.on_receive = on_receive
+        self.pending = []
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        (self.wake_read, self.wake_write) = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        self.sent = 0
+        self.combined = 0
+
+    def on(self, house, unit):
+        return self.submit(X10Command('On', *self.address(house, unit)))
+
+    def off(self, house, unit):
+        return self.submit(X10Command('Off', *self.address(house, unit)))
+
+    def bright(self, house, unit, steps=1):
+        return self.submit(X10Command(
+            'Bright', *self.address(house, unit), dims=steps))
+
+    def dim(self, house, unit, steps=1):
+        return self.submit(X10Command(
+            'Dim', *self.address(house, unit), dims=-steps))
+
+    def status(self):
+        return self.submit(X10Command('Status'))
+
+    @staticmethod
+    def address(house, unit):
+        """
+        Turns a house code such as 'A' and a unit number from 1 to 16 into
+        the codes the CM11A uses for them.
+        """
+        return (housecode[house.upper()], unitcode[str(unit)])
+
+    def submit(self, command):
+        future = command.futures[0]
+        with self.lock:
+            if self.stopping.is_set():
+                future.set_exception(X10Error("The X10 controller stopped"))
+                return future
+            self.combine(command)
+        os.write(self.wake_write, b'\0')
+        return future
+
+    def combine(self, command):
+        """
+        Adds command to the queue, folding it into whatever is already
+        waiting for the same unit where that ends up the same.
+        """
+        mine = [queued for queued in self.pending
+                if (queued.house, queued.unit) == (command.house,
+                                                   command.unit)]
+        last = mine[-1] if mine else None
+
+        if command.kind in ('Status', 'Off'):
+            replaced = mine
+        elif command.kind == 'On':
+            replaced = [last] if last is not None and last.is_switch() else []
+        elif last is not None and last.is_level():
+            last.dims += command.dims
+            last.futures.extend(command.futures)
+            self.combined += 1
+            if last.dims == 0:
+                self.pending.remove(last)
+                for future in last.futures:
+                    if future.set_running_or_notify_cancel():
+                        future.set_result(True)
+            return
+        else:
+            replaced = []
+
+        for queued in replaced:
+            self.pending.remove(queued)
+            command.futures.extend(queued.futures)
+            self.combined += 1
+        self.pending.append(command)
+
+    def take(self):
+        """
+        Returns the next command anyone is still waiting on, or None.
+        """
+        with self.lock:
+            while self.pending:
+                command = self.pending.pop(0)
+                command.futures = [
+                    future for future in command.futures
+                    if future.set_running_or_notify_cancel()]
+                if command.futures:
+                    return command
+        return None
+
+    def open_port(self):
+        if self.serial is not None:
+            return self.serial
+
+        import serial
+        return serial.Serial(self.port_name, 4800, timeout=REPLY_TIMEOUT)
+
+    def run(self):
+        try:
+            self.serial = self.open_port()
+        except OSError as e:
+            self.log.error(f"Unable to open {self.port_name}: {e}")
+            self.fail_pending(X10Error(f"Unable to open {self.port_name}"))
+            return
+
+        selector = selectors.DefaultSelector()
+        selector.register(self.serial.fileno(), selectors.EVENT_READ, 'port')
+        selector.register(self.wake_read, selectors.EVENT_READ, 'wake')
+        try:
+            while not self.stopping.is_set():
+                command = self.take()
+                if command is not None:
+                    self.execute(command)
+                    continue
+
+                for key, _ in selector.select():
+                    if key.data == 'wake':
+                        self.drain_wakeups()
+                    else:
+                        self.listen()
+        finally:
+            selector.close()
+            self.fail_pending(X10Error("The X10 controller stopped"))
+
+    def listen(self):
+        """
+        Deals with whatever the CM11A sent while nothing else was going
+        on. A failed exchange is logged and then forgotten, since it will
+        ask again.
+        """
+        try:
+            self.unprompted(self.serial.read(1))
+        except (X10Error, OSError) as e:
+            self.log.error(f"X10 unprompted exchange failed: {e}")
+
+    def drain_wakeups(self):
+        try:
+            while os.read(self.wake_read, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def execute(self, command):
+        try:
+            if command.kind == 'Status':
+                result = self.read_status()
+            else:
+                for packet in command.packets():
+                    self.send(packet)
+                result = True
+        except (X10Error, OSError) as e:
+            self.log.error(f"X10 {command.kind} failed: {e}")
+            for future in command.futures:
+                future.set_exception(X10Error(str(e)))
+            return
+
+        self.sent += 1
+        for future in command.futures:
+            future.set_result(result)
+
+    def send(self, packet, expected=None):
+        """
+        Sends a packet and waits for the CM11A to confirm it: it answers
+        with a checksum, which gets an ACK, and then says it is ready.
+        Anything it sends unprompted along the way is dealt with first and
+        the packet is sent again.
+        """
+        if expected is None:
+            expected = checksum(packet)
+        for _ in range(RETRIES):
+            self.serial.write(packet)
+            reply = self.serial.read(1)
+            if reply and reply[0] == expected:
+                self.serial.write(bytes([ACK]))
+                if self.serial.read(1) == bytes([READY]):
+                    return
+                raise X10Error("Missing ready response")
+            if reply:
+                self.unprompted(reply)
+        raise X10Error(f"No good checksum after {RETRIES} tries")
+
+    def unprompted(self, byte):
+        """
+        Answers a byte the CM11A sent without being asked.
+        """
+        if byte == bytes([CLOCK_REQUEST]):
+            # It keeps asking until it is answered, so whatever has piled
+            # up is the same request.
+            self.serial.reset_input_buffer()
+            self.log.info("Resetting X10 clock.")
+            self.send(SET_CLOCK, checksum(SET_CLOCK[1:]))
+        elif byte == bytes([POLL]):
+            self.serial.write(bytes([POLL_REPLY]))
+            length = self.serial.read(1)
+            if not length or length[0] == POLL:
+                # It didn't hear us. It will poll again.
+                return
+            data = self.serial.read(length[0])
+            self.log.debug(f"X10 received {data.hex()}")
+            if self.on_receive is not None:
+                try:
+                    self.on_receive(data)
+                except Exception:
+                    self.log.exception("X10 receive callback failed")
+
+    def read_status(self):
+        self.serial.reset_input_buffer()
+        self.serial.write(bytes([STATUS_REQUEST]))
+        status = self.serial.read(14)
+        self.serial.write(bytes([ACK]))
+        if len(status) != 14:
+            raise X10Error(f"Short status: {len(status)} bytes")
+        return status
+
+    def fail_pending(self, error):
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+        for command in pending:
+            for future in command.futures:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(error)
+
+    def stop(self):
+        with self.lock:
+            self.stopping.set()
+        os.write(self.wake_write, b'\0')
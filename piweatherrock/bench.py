@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from functools import partial
+
+from piweatherrock.weather import Weather
+from piweatherrock.plugin_weather_daily import PluginWeatherDaily
+from piweatherrock.plugin_weather_hourly import PluginWeatherHourly
+from piweatherrock.plugin_info import PluginInfo
+
+SAMPLE_CONFIG = os.path.join(os.path.dirname(__file__), "config.json-sample")
+DEFAULT_FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "example", "darksky_forecast.json")
+DEFAULT_SIZES = [(800, 480), (1024, 600), (1920, 1080)]
+
+
+def percentile(values, pct):
+    """
+    Returns the value pct percent of the way through values using the
+    nearest rank.
+    """
+    ordered = sorted(values)
+    index = int(round(pct / 100 * (len(ordered) - 1)))
+    return ordered[min(len(ordered) - 1, index)]
+
+
+def count_pygame_calls(draw, frames):
+    """
+    Draws frames times and returns the average number of calls per frame
+    into pygame's C functions, both in total and by function name.
+    """
+    counts = {}
+
+    def profile(frame, event, arg):
+        if event != 'c_call':
+            return
+        module = getattr(arg, '__module__', None)
+        owner = getattr(arg, '__self__', None)
+        if module is None and owner is not None:
+            module = type(owner).__module__
+        if module and module.startswith('pygame'):
+            name = getattr(arg, '__qualname__', arg.__name__)
+            counts[name] = counts.get(name, 0) + 1
+
+    sys.setprofile(profile)
+    try:
+        for _ in range(frames):
+            draw()
+    finally:
+        sys.setprofile(None)
+
+    by_name = {name: count / frames for name, count in sorted(counts.items())}
+    return sum(by_name.values()), by_name
+
+
+def measure(draw, frames, before=None):
+    """
+    Times frames calls to draw and returns the frame time and allocation
+    figures for them. before, if given, is called ahead of each frame
+    without being timed.
+    """
+    times = []
+    for _ in range(frames):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        draw()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # Allocations are measured on their own pass since tracing slows
+    # everything down.
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(frames):
+            if before is not None:
+                before()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            draw()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    if before is None:
+        calls, by_name = count_pygame_calls(draw, frames)
+    else:
+        def redraw():
+            before()
+            draw()
+        calls, by_name = count_pygame_calls(redraw, frames)
+
+    return {
+        "p50_ms": round(percentile(times, 50), 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "max_ms": round(max(times), 3),
+        "alloc_peak_kb": round(sum(peaks) / len(peaks) / 1024, 1),
+        "pygame_calls": round(calls, 1),
+        "pygame_calls_by_name": by_name,
+    }
+
+
+def write_config(directory, fixture, size):
+    """
+    Writes a config file into directory that replays fixture on a
+    headless screen of the given size and returns its path.
+    """
+    with open(SAMPLE_CONFIG, "r") as f:
+        config = json.load(f)
+
+    config["provider"] = "replay"
+    config["provider_path"] = os.path.abspath(fixture)
+    config["headless"] = True
+    config["headless_size"] = list(size)
+    config["log_level"] = "WARNING"
+
+    config_file = os.path.join(directory, "config.json")
+    with open(config_file, "w") as f:
+        json.dump(config, f)
+
+    return config_file
+
+
+def run_benchmark(fixtures=None, sizes=None, frames=100):
+    """
+    Draws each screen frames times at every size for every fixture. Each
+    screen is measured twice: 'frame' is a normal once-a-second update
+    and 'redraw' is a full redraw like the one after a new forecast
+    arrives. Returns a dict of results keyed by
+    'fixture/size/screen/kind'.
+    """
+    fixtures = fixtures or [DEFAULT_FIXTURE]
+    sizes = sizes or DEFAULT_SIZES
+    results = {}
+
+    for fixture in fixtures:
+        fixture_name = os.path.splitext(os.path.basename(fixture))[0]
+        with tempfile.TemporaryDirectory() as directory:
+            weather_rock = Weather(write_config(directory, fixture, sizes[0]))
+            if weather_rock.forecast_version == 0:
+                raise ValueError(f"Unable to load forecast from {fixture}")
+
+            screens = {
+                'daily': PluginWeatherDaily(weather_rock),
+                'hourly': PluginWeatherHourly(weather_rock),
+                'info': PluginInfo(weather_rock),
+            }
+            # Bound now rather than looked up when called, so each draw
+            # keeps this fixture's weather rock
+            draws = {
+                'daily': partial(screens['daily'].disp_daily, weather_rock),
+                'hourly': partial(screens['hourly'].disp_hourly,
+                                  weather_rock),
+                'info': partial(screens['info'].disp_info, weather_rock),
+            }
+
+            for size in sizes:
+                weather_rock.sizing(size)
+                for screen, draw in draws.items():
+                    key = f"{fixture_name}/{size[0]}x{size[1]}/{screen}"
+                    weather_rock.renderer.invalidate()
+                    draw()
+                    results[f"{key}/frame"] = measure(draw, frames)
+                    results[f"{key}/redraw"] = measure(
+                        draw, frames, weather_rock.renderer.invalidate)
+
+            weather_rock.provider.close()
+
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Returns a list of (name, baseline p95, current p95) for every result
+    whose p95 frame time is more than tolerance slower than baseline.
+    """
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append((name, base["p95_ms"], current["p95_ms"]))
+
+    return regressions
+
+
+def format_report(results):
+    """
+    Returns the results as a table with one line per measurement.
+    """
+    lines = [f"{'':44} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+             f"{'alloc kb':>9} {'pg calls':>9}"]
+    for name, result in results.items():
+        lines.append(
+            f"{name:44} {result['p50_ms']:8.3f} {result['p95_ms']:8.3f} "
+            f"{result['max_ms']:8.3f} {result['alloc_peak_kb']:9.1f} "
+            f"{result['pygame_calls']:9.1f}")
+
+    return "\n".join(lines)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import time
+
+GLYPHS = '0123456789:'
+
+
+class Clock:
+    """
+    The time and date at the top of the daily and hourly screens.
+
+    The date is rendered once a day and the am/pm marker twice. The time
+    is put together from pre-rendered digits and a colon, each placed
+    where it would have been had the whole line been rendered at once.
+    draw() does nothing until the minute changes, and then only redraws
+    the pieces of the line that are different.
+    """
+
+    __slots__ = ('layout', 'text', 'font', 'small_font', 'color',
+                 'twelve_hour', 'glyphs', 'minute', 'date', 'date_surface',
+                 'am_pm', 'am_pm_surface', 'pieces')
+
+    def __init__(self, context, font_name="freesans", color=(255, 255, 255)):
+        self.layout = context.layout
+        self.text = context.text
+        self.font = context.fonts.get(
+            font_name, self.layout.fonts['time'], bold=1)
+        # Small Font for Seconds
+        self.small_font = context.fonts.get(
+            font_name, self.layout.fonts['time_small'], bold=1)
+        self.color = color
+        self.twelve_hour = context.config["12hour_disp"]
+        self.glyphs = {glyph: self.text.render(self.font, glyph, color)
+                       for glyph in GLYPHS}
+        self.minute = None
+        self.date = None
+        self.date_surface = None
+        self.am_pm = None
+        self.am_pm_surface = None
+        # (surface, rect) for each piece of the line on the screen
+        self.pieces = []
+
+    def draw(self, screen, background, redraw):
+        """
+        Draws the clock if it has changed since the last call, or if
+        redraw is True, and returns the rects that changed.
+        """
+        now = time.time()
+        minute = int(now // 60)
+        if minute == self.minute and not redraw:
+            return []
+        self.minute = minute
+
+        pieces = self.layout_pieces(time.localtime(now))
+        if redraw:
+            for surface, rect in pieces:
+                screen.blit(surface, rect)
+            self.pieces = pieces
+            return [rect for surface, rect in pieces]
+
+        # Only the pieces that changed or moved need drawing again. There
+        # are always the same number of them.
+        changed = [new[1].union(old[1])
+                   for new, old in zip(pieces, self.pieces) if new != old]
+
+        # Put back what was under each changed area and draw whatever now
+        # overlaps it. Clipping keeps neighbours that were already drawn
+        # from having their edges drawn twice.
+        for dirty in changed:
+            screen.blit(background, dirty, dirty)
+            screen.set_clip(dirty)
+            for surface, rect in pieces:
+                if rect.colliderect(dirty):
+                    screen.blit(surface, rect)
+            screen.set_clip(None)
+
+        self.pieces = pieces
+        return changed
+
+    def layout_pieces(self, now):
+        """
+        Works out where each piece of the line goes for the time now.
+        """
+        date = time.strftime("%a, %b %d   ", now)
+        if self.twelve_hour:
+            hours_and_minutes = time.strftime("%I:%M", now)
+            am_pm = time.strftime(" %p", now)
+        else:
+            hours_and_minutes = time.strftime("%H:%M", now)
+            am_pm = "hr"
+
+        if date != self.date:
+            self.date = date
+            self.date_surface = self.text.render(self.font, date, self.color)
+        if am_pm != self.am_pm:
+            self.am_pm = am_pm
+            self.am_pm_surface = self.text.render(
+                self.small_font, am_pm, self.color)
+
+        # The line is centred as a whole, so the size of the full string
+        # decides where everything goes. Each glyph ends where the line
+        # would end if it stopped after that glyph. Sizing a string
+        # doesn't render it.
+        line = date + hours_and_minutes
+        line_x = self.font.size(line)[0]
+        x = self.layout.time.x - (
+            line_x + self.am_pm_surface.get_width()) / 2
+        y = self.layout.time.y
+
+        pieces = [(self.date_surface, self.date_surface.get_rect(
+            topleft=(int(x), y)))]
+        for index, glyph in enumerate(hours_and_minutes):
+            surface = self.glyphs[glyph]
+            glyph_x = x + self.font.size(
+                line[:len(date) + index + 1])[0] - surface.get_width()
+            pieces.append((surface, surface.get_rect(
+                topleft=(int(glyph_x), y))))
+        pieces.append((self.am_pm_surface, self.am_pm_surface.get_rect(
+            topleft=(int(x + line_x + 3), self.layout.time_small_y))))
+
+        return pieces
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import json
+import logging
+import os
+import random
+import socketserver
+import threading
+import time
+
+from piweatherrock.fetcher import RETRY_DELAY
+
+# The settings that make up a location. Requests for the same location
+# share one fetch no matter how many displays ask for it.
+LOCATION_KEYS = ('provider', 'provider_path', 'lat', 'lon', 'units', 'lang')
+
+# How long a request for a location nobody has asked about before waits
+# for its first fetch, in seconds
+FIRST_FETCH_TIMEOUT = 20
+
+# How many calls can be made back to back, such as when several new
+# locations are asked for at once, before they have to be spread out
+FETCH_BURST = 10
+
+# The longest a location that keeps failing waits between tries, in
+# seconds. Each failure in a row doubles the wait from RETRY_DELAY.
+MAX_RETRY_DELAY = 3600
+
+
+def location_key(spec):
+    """
+    Returns a hashable key for the location described by spec.
+    """
+    return tuple(
+        round(spec[key], 4) if key in ('lat', 'lon') else spec.get(key)
+        for key in LOCATION_KEYS)
+
+
+class TokenBucket:
+    """
+    Lets calls through at rate per second on average while allowing up
+    to burst of them at once after a quiet spell. It starts full.
+    """
+
+    def __init__(self, rate, burst, now=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.time() if now is None else now
+
+    def refill(self, now):
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now):
+        """
+        Returns when the next call can be made, which is now if one can
+        be made right away.
+        """
+        self.refill(now)
+        if self.tokens >= 1:
+            return now
+        return now + (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self.refill(now)
+        self.tokens -= 1
+
+
+class Location:
+    """
+    One place forecasts are fetched for along with its latest forecast.
+    """
+
+    def __init__(self, config, provider, pinned):
+        self.config = config
+        self.provider = provider
+        self.pinned = pinned
+        self.payload = None
+        self.fetched_at = 0
+        self.next_due = 0
+        self.failures = 0
+        self.last_request = time.time()
+
+
+class FetchService:
+    """
+    Fetches forecasts for any number of locations on behalf of every rock
+    on the same machine, so that ten displays showing the same place make
+    one api call instead of ten.
+
+    Locations come from the 'locations' list in the config file and from
+    whatever the displays ask for. Each location is refreshed every
+    'update_freq' seconds, give or take some jitter. Calls for all
+    locations together go through a token bucket so they stay within
+    'fetch_calls_per_day' over the day while still letting up to
+    'fetch_burst' happen at once, so a display asking for a new location
+    doesn't have to wait its turn behind the others. New locations are
+    due right away so they go first. One that fails backs off, doubling
+    its wait each time, so it never gets ahead of refreshes that are
+    already due. Locations that no display has asked about in a while,
+    and that aren't in the config file, are dropped.
+
+    Displays ask for forecasts over the Unix socket named by
+    'fetch_service'. Each request is one line of json describing the
+    location and gets one line of json back with the latest forecast and
+    when the service fetched it. Displays already ask on their own
+    'update_freq' schedule, and answering from memory is cheap, so the
+    service doesn't keep connections open to push to them.
+    """
+
+    def __init__(self, config, get_provider):
+        self.config = config
+        self.get_provider = get_provider
+        self.interval = config["update_freq"]
+        self.bucket = TokenBucket(
+            config.get("fetch_calls_per_day", 1000) / 86400,
+            config.get("fetch_burst", FETCH_BURST))
+        self.locations = {}
+        self.last_call = 0
+        self.calls = 0
+        self.changed = threading.Condition()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.server = None
+        self.log = logging.getLogger(__name__)
+
+        for spec in config.get("locations", []):
+            self.add(spec, pinned=True)
+
+    def add(self, spec, pinned=False):
+        """
+        Returns the Location for spec, adding it if it's new. Missing
+        settings are taken from the service's own config.
+        """
+        location_config = dict(self.config)
+        # This is the service, so its providers go straight to the api
+        location_config.pop("fetch_service", None)
+        location_config.update(
+            {key: spec[key] for key in LOCATION_KEYS if key in spec})
+        key = location_key(location_config)
+
+        with self.changed:
+            location = self.locations.get(key)
+            if location is None:
+                location = Location(location_config,
+                                    self.get_provider(location_config),
+                                    pinned)
+                self.locations[key] = location
+                self.log.info(f"Fetching forecasts for {key}")
+                self.wakeup.set()
+            location.last_request = time.time()
+
+        return location
+
+    def lookup(self, spec, timeout=FIRST_FETCH_TIMEOUT):
+        """
+        Returns the latest forecast for spec as a dict, waiting up to
+        timeout seconds if it hasn't been fetched yet. Returns None if
+        there still isn't one.
+        """
+        location = self.add(spec)
+        with self.changed:
+            self.changed.wait_for(lambda: location.payload is not None,
+                                  timeout)
+            if location.payload is None:
+                return None
+            return {
+                "data": location.payload,
+                "fetched_at": location.fetched_at,
+                "etag": location.provider.etag,
+                "last_modified": location.provider.last_modified,
+            }
+
+    def next_location(self, now):
+        """
+        Drops locations nobody wants anymore and returns the one to fetch
+        next, which is the one due soonest.
+        """
+        with self.changed:
+            for key, location in list(self.locations.items()):
+                idle = now - location.last_request
+                if not location.pinned and idle > self.interval * 3:
+                    self.log.info(f"No longer fetching forecasts for {key}")
+                    location.provider.close()
+                    del self.locations[key]
+
+            if not self.locations:
+                return None
+            return min(self.locations.values(),
+                       key=lambda location: location.next_due)
+
+    def run(self):
+        """
+        Fetches forecasts as they come due until stop() is called.
+        """
+        while not self.stopping.is_set():
+            now = time.time()
+            location = self.next_location(now)
+            if location is None:
+                wait = self.interval
+            else:
+                due = max(location.next_due, self.bucket.ready_at(now))
+                wait = due - now
+
+            if wait > 0:
+                self.wakeup.wait(min(wait, self.interval))
+                self.wakeup.clear()
+                continue
+
+            self.fetch(location)
+
+    def fetch(self, location):
+        # Imported here since displays import this module for its
+        # settings and shouldn't have to wait on requests when they start
+        import requests
+
+        self.last_call = time.time()
+        self.bucket.take(self.last_call)
+        self.calls += 1
+        try:
+            payload = location.provider.fetch()
+            # Make sure it's usable before handing it out
+            location.provider.parse(payload)
+        except (requests.exceptions.RequestException, OSError) as e:
+            self.log.error(f"Unable to fetch forecast: {e}")
+            self.retry_later(location)
+            return
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            self.log.error(f"Unexpected forecast data: {e}")
+            self.retry_later(location)
+            return
+
+        with self.changed:
+            location.payload = payload
+            location.failures = 0
+            location.fetched_at = self.last_call
+            location.next_due = self.last_call + self.interval * \
+                random.uniform(0.9, 1.1)
+            self.changed.notify_all()
+
+    def retry_later(self, location):
+        """
+        Puts off the next try for a location that just failed, for longer
+        each time it fails in a row.
+        """
+        delay = min(RETRY_DELAY * 2 ** location.failures, MAX_RETRY_DELAY)
+        location.failures += 1
+        location.next_due = time.time() + delay
+
+    def serve(self, socket_path):
+        """
+        Starts answering requests from displays on socket_path.
+        """
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        handler = type("FetchHandler", (FetchHandler,), {"service": self})
+        self.server = socketserver.ThreadingUnixStreamServer(
+            socket_path, handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever,
+                         name="fetch-service", daemon=True).start()
+        self.log.info(f"Serving forecasts on {socket_path}")
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for location in self.locations.values():
+            location.provider.close()
+
+
+class FetchHandler(socketserver.StreamRequestHandler):
+    service = None
+
+    def handle(self):
+        try:
+            spec = json.loads(self.rfile.readline())
+            response = self.service.lookup(spec)
+            if response is None:
+                response = {"error": "No forecast available yet"}
+        except (KeyError, TypeError, ValueError) as e:
+            response = {"error": f"Bad request: {e}"}
+
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import logging
+import random
+import threading
+
+# How long to wait before trying again after a failed fetch, in seconds.
+RETRY_DELAY = 60
+
+
+class ForecastFetcher(threading.Thread):
+    """
+    Refreshes the forecast in the background so that slow network calls
+    never hold up the display.
+
+    Every 'interval' seconds, give or take a bit of random jitter so that
+    many rocks don't all hit the API at once, the fetch function is
+    called. When it returns a snapshot, the snapshot is published by
+    swapping the 'latest' reference and setting the 'new_data' event. The
+    UI thread only needs to check that event and pick up 'latest'.
+    """
+
+    def __init__(self, fetch, interval, jitter=0.1, first_delay=None):
+        super().__init__(name="ForecastFetcher", daemon=True)
+        self.fetch = fetch
+        self.interval = interval
+        self.jitter = jitter
+        self.first_delay = first_delay
+        self.latest = None
+        self.new_data = threading.Event()
+        self.stopping = threading.Event()
+        self.log = logging.getLogger(__name__)
+
+    def next_delay(self, succeeded):
+        """
+        Returns how long to wait before the next fetch.
+        """
+        if not succeeded:
+            return min(RETRY_DELAY, self.interval)
+
+        spread = self.interval * self.jitter
+        return max(1, self.interval + random.uniform(-spread, spread))
+
+    def run(self):
+        if self.first_delay is None:
+            delay = self.next_delay(True)
+        else:
+            delay = self.first_delay
+        while not self.stopping.wait(delay):
+            try:
+                snapshot = self.fetch()
+            except Exception as e:
+                self.log.exception(f"Unexpected error fetching forecast: {e}")
+                snapshot = None
+
+            if snapshot is not None:
+                self.latest = snapshot
+                self.new_data.set()
+            delay = self.next_delay(snapshot is not None)
+
+    def take(self):
+        """
+        Returns the newest snapshot if one has been published since the
+        last call, otherwise None.
+        """
+        if not self.new_data.is_set():
+            return None
+        self.new_data.clear()
+        return self.latest
+
+    def stop(self):
+        self.stopping.set()
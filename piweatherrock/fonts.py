@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import json
+import logging
+import os
+
+import pygame
+
+
+def font_file(path, _size, bold, _italic):
+    """
+    Stands in for the function pygame.font.SysFont() uses to create a font
+    so that we learn which file it picked instead. pygame passes the size
+    and italic flag too, but they don't change which file that is.
+    """
+    return [path, bold]
+
+
+class FontCache:
+    """
+    Holds on to the fonts used to draw the screens so that each one only
+    has to be looked up and loaded once instead of on every redraw.
+
+    Fonts are keyed by name, pixel size, and boldness. The cache is
+    emptied whenever the screen is resized since every size changes along
+    with the screen. The hit and miss counters make it easy to confirm
+    that a steady frame doesn't load any fonts.
+
+    Finding the file for a font name means asking fontconfig, which can
+    take seconds on a Pi. If files_path is given, the files found are
+    saved there and reused on later starts.
+    """
+
+    def __init__(self, files_path=None):
+        self.fonts = {}
+        self.hits = 0
+        self.misses = 0
+        self.files_path = files_path
+        self.log = logging.getLogger(__name__)
+        self.files = self.load_files()
+
+    def get(self, name, size, bold=False):
+        """
+        Returns the font matching name, size, and boldness, loading it
+        first if this is the first time it has been asked for.
+        """
+        key = (name, int(size), bool(bold))
+        font = self.fonts.get(key)
+        if font is None:
+            self.misses += 1
+            (path, embolden) = self.find(name, key[2])
+            font = pygame.font.Font(path, key[1])
+            if embolden:
+                font.set_bold(True)
+            self.fonts[key] = font
+        else:
+            self.hits += 1
+
+        return font
+
+    def find(self, name, bold):
+        """
+        Returns the file pygame.font.SysFont() would use for name along
+        with whether pygame has to make it bold itself. A file of None
+        means pygame's default font.
+        """
+        key = f"{name}:{'bold' if bold else 'regular'}"
+        found = self.files.get(key)
+        if found is not None and (found[0] is None or
+                                  os.path.exists(found[0])):
+            return found
+
+        found = pygame.font.SysFont(name, 1, bold=bold, constructor=font_file)
+        self.files[key] = found
+        self.save_files()
+        return found
+
+    def load_files(self):
+        if not self.files_path:
+            return {}
+
+        try:
+            with open(self.files_path, "r") as f:
+                files = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.log.warning(f"Ignoring unreadable font cache: {e}")
+            return {}
+
+        if not isinstance(files, dict):
+            return {}
+        return files
+
+    def save_files(self):
+        if not self.files_path:
+            return
+
+        tmp_file = f"{self.files_path}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self.files, f)
+            os.replace(tmp_file, self.files_path)
+        except OSError as e:
+            self.log.warning(f"Unable to save font cache: {e}")
+
+    def clear(self):
+        """
+        Drops every cached font and resets the counters. The font files
+        found so far are kept since they don't depend on the screen size.
+        """
+        self.fonts.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import math
+
+from array import array
+
+# Used for any number a provider didn't give us
+MISSING = float('nan')
+
+
+class Forecast:
+    """
+    A forecast in the same shape no matter which provider it came from.
+    Providers turn their own responses into one of these so that the
+    plugins never have to know where the data came from.
+    """
+
+    __slots__ = ('current', 'hourly', 'daily')
+
+    def __init__(self, current, hourly, daily):
+        self.current = current
+        self.hourly = hourly
+        self.daily = daily
+
+
+class Conditions:
+    """
+    The conditions right now. Icons use the names of the icons that ship
+    with this project (ex: 'partlycloudy' or 'nt_clear').
+    """
+
+    __slots__ = ('time', 'summary', 'icon', 'temperature',
+                 'apparent_temperature', 'humidity', 'wind_speed',
+                 'wind_bearing', 'precip_probability')
+
+    def __init__(self, time, summary='', icon='unknown',
+                 temperature=MISSING, apparent_temperature=MISSING,
+                 humidity=MISSING, wind_speed=MISSING, wind_bearing=MISSING,
+                 precip_probability=0.0):
+        self.time = time
+        self.summary = summary
+        self.icon = icon
+        self.temperature = temperature
+        self.apparent_temperature = apparent_temperature
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.wind_bearing = wind_bearing
+        self.precip_probability = precip_probability
+
+
+class Series:
+    """
+    A run of hourly or daily forecast periods. Rather than an object per
+    period, each field is kept in its own array and indexing the series
+    hands back a small Period view into those arrays.
+    """
+
+    __slots__ = ('time', 'temperature', 'temperature_low',
+                 'temperature_high', 'precip_probability', 'sunrise_time',
+                 'sunset_time', 'icon', 'summary')
+
+    numeric_fields = ('time', 'temperature', 'temperature_low',
+                      'temperature_high', 'precip_probability',
+                      'sunrise_time', 'sunset_time')
+
+    def __init__(self):
+        for field in self.numeric_fields:
+            setattr(self, field, array('d'))
+        self.icon = []
+        self.summary = []
+
+    @classmethod
+    def from_columns(cls, icon, summary, **columns):
+        """
+        Builds a series around existing sequences, one per numeric field,
+        without copying them. The series keeps using them as they are, so
+        callers must pass arrays they own rather than views into memory
+        that can change underneath it, such as shared memory.
+        """
+        series = cls.__new__(cls)
+        for field in cls.numeric_fields:
+            setattr(series, field, columns[field])
+        series.icon = icon
+        series.summary = summary
+        return series
+
+    def append(self, time, icon='unknown', summary='', temperature=MISSING,
+               temperature_low=MISSING, temperature_high=MISSING,
+               precip_probability=0.0, sunrise_time=MISSING,
+               sunset_time=MISSING):
+        self.time.append(time)
+        self.temperature.append(temperature)
+        self.temperature_low.append(temperature_low)
+        self.temperature_high.append(temperature_high)
+        self.precip_probability.append(precip_probability)
+        self.sunrise_time.append(sunrise_time)
+        self.sunset_time.append(sunset_time)
+        self.icon.append(icon)
+        self.summary.append(summary)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("forecast period out of range")
+        return Period(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Period(self, index)
+
+
+class Period:
+    """
+    A single hour or day in a Series. Attribute lookups read straight from
+    the series, so forecast.daily[1].temperature_high works as expected.
+    """
+
+    __slots__ = ('series', 'index')
+
+    def __init__(self, series, index):
+        self.series = series
+        self.index = index
+
+    def __getattr__(self, name):
+        if name in Period.__slots__:
+            raise AttributeError(name)
+        return getattr(self.series, name)[self.index]
+
+    def has(self, name):
+        """
+        Returns True if the provider gave us a value for name.
+        """
+        return not is_missing(getattr(self, name))
+
+
+def is_missing(value):
+    return isinstance(value, float) and math.isnan(value)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import gzip
+import json
+import logging
+import os
+
+
+class ForecastCache:
+    """
+    Saves the last good api response to disk so that the display can
+    start from it right away after a restart, even if the network is down,
+    and without spending an api call.
+
+    The file is gzipped json holding the response along with when it was
+    fetched, which provider it came from, and any ETag / Last-Modified
+    headers that came with it.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.log = logging.getLogger(__name__)
+
+    def load(self, provider):
+        """
+        Returns the saved entry as a dict with the keys 'data',
+        'fetched_at', 'provider', 'etag', and 'last_modified', or None if
+        there isn't a usable cache from the given provider.
+        """
+        try:
+            with gzip.open(self.cache_file, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.log.warning(f"Ignoring unreadable forecast cache: {e}")
+            return None
+
+        if not isinstance(entry, dict) or "data" not in entry:
+            return None
+        if entry.get("provider", "darksky") != provider:
+            return None
+
+        return entry
+
+    def save(self, data, fetched_at, provider, etag=None, last_modified=None):
+        """
+        Writes a response to the cache. The file is replaced atomically so
+        a crash or power loss never leaves a half written cache behind.
+        """
+        entry = {
+            "fetched_at": fetched_at,
+            "provider": provider,
+            "etag": etag,
+            "last_modified": last_modified,
+            "data": data,
+        }
+        tmp_file = f"{self.cache_file}.tmp"
+        try:
+            with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(',', ':'))
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            self.log.warning(f"Unable to save forecast cache: {e}")
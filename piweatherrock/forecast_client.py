@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import logging
+import time
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+DARKSKY_URL = 'https://api.darksky.net/forecast'
+
+# Too Many Requests. Along with any 5xx it's worth trying again; any
+# other error, such as a bad api key, would only fail the same way.
+TOO_MANY_REQUESTS = 429
+
+
+def is_retryable(error):
+    """
+    Returns True if a failed request might work when tried again:
+    connection problems, timeouts, server errors and rate limiting.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code
+        return status == TOO_MANY_REQUESTS or status >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout))
+
+
+class ForecastClient:
+    """
+    Fetches forecasts from Dark Sky over a single keep-alive session so
+    that the TLS handshake isn't repeated on every request.
+
+    Requests that fail because of the network or the server are retried
+    with exponential backoff. Other errors, such as a bad api key, are
+    raised right away so they don't use up api calls. Once a response
+    has been received, later requests are made conditional on its ETag /
+    Last-Modified headers so that an unchanged forecast doesn't have to be
+    downloaded again.
+    """
+
+    def __init__(self, api_key, base_url=DARKSKY_URL, connect_timeout=5,
+                 read_timeout=15, retries=3, backoff=1):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.log = logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip'})
+
+        # Details of the last good response, used for conditional requests
+        self.data = None
+        self.etag = None
+        self.last_modified = None
+
+        # Details of the last request, for anyone who wants to report on it
+        self.latency = 0
+        self.bytes_received = 0
+        self.retry_count = 0
+
+    def remember(self, data, etag=None, last_modified=None):
+        """
+        Seeds the client with a previous response, such as one from the
+        on-disk cache, so that the next request can be conditional.
+        """
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def fetch(self, lat, lon, **params):
+        """
+        Returns the decoded forecast for a location. If the server reports
+        that nothing has changed since the last response, that response is
+        returned again. Raises requests.exceptions.RequestException once
+        all retries have failed, or straight away for errors that retrying
+        won't fix.
+        """
+        url = f"{self.base_url}/{self.api_key}/{lat},{lon}"
+        headers = {}
+        if self.data is not None:
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(
+                    url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code != 304:
+                    response.raise_for_status()
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt >= self.retries or not is_retryable(e):
+                    raise
+                delay = self.backoff * 2 ** attempt
+                attempt += 1
+                self.log.warning(f"Forecast request failed ({e}), "
+                                 f"retry {attempt} in {delay}s")
+                time.sleep(delay)
+
+        self.latency = time.monotonic() - start
+        self.bytes_received = int(response.headers.get(
+            'Content-Length', len(response.content)))
+        self.retry_count = attempt
+        self.log.info(f"Forecast fetched: status {response.status_code}, "
+                      f"{self.latency * 1000:.0f} ms, "
+                      f"{self.bytes_received} bytes, {attempt} retries")
+
+        if response.status_code == 304:
+            return self.data
+
+        self.data = response.json()
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        return self.data
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import datetime
+
+from collections import namedtuple
+
+from piweatherrock.forecast import is_missing
+
+UNICODE_DEGREE = u'\xb0'
+
+# Everything shown in one of the four boxes on the bottom half of the
+# daily and hourly screens.
+Subwindow = namedtuple('Subwindow', ['label', 'temperature', 'precip', 'icon'])
+
+
+class ForecastView:
+    """
+    The text and icons the weather screens show, worked out once when a
+    forecast arrives instead of on every frame. The plugins only read
+    from this.
+    """
+
+    __slots__ = ('temperature', 'temperature_letter', 'feels_like', 'wind',
+                 'humidity', 'summary', 'take_umbrella', 'umbrella_text',
+                 'daily', 'hourly')
+
+    def __init__(self, weather, config):
+        units = config["units"]
+        current = weather.current
+
+        self.temperature = str(int(round(current.temperature)))
+        self.temperature_letter = get_temperature_letter(units)
+        self.feels_like = str(int(round(current.apparent_temperature)))
+        self.summary = current.summary
+
+        if is_missing(current.wind_bearing):
+            wind_direction = ''
+        else:
+            wind_direction = deg_to_compass(current.wind_bearing) + ' @ '
+        self.wind = wind_direction + str(
+            int(round(current.wind_speed))) + \
+            ' ' + get_windspeed_abbreviation(units)
+        self.humidity = str(int(round((current.humidity * 100)))) + '%'
+
+        self.take_umbrella = umbrella_needed(weather)
+        if self.take_umbrella:
+            self.umbrella_text = 'Grab your umbrella!'
+        else:
+            self.umbrella_text = 'No umbrella needed today.'
+
+        self.daily = []
+        for index in range(min(4, len(weather.daily))):
+            day = weather.daily[index]
+            if index == 0:
+                label = "Today"
+            else:
+                label = datetime.datetime.fromtimestamp(
+                    day.time).strftime("%A")
+            self.daily.append(subwindow(day, label, self.temperature_letter))
+
+        self.hourly = []
+        for index in range(min(4, len(weather.hourly))):
+            hour = weather.hourly[index]
+            self.hourly.append(subwindow(
+                hour, hour_label(hour.time, config["12hour_disp"]),
+                self.temperature_letter))
+
+
+def subwindow(data, label, temperature_letter):
+    if data.has('temperature_low'):
+        temperature = str(int(round(data.temperature_low))) + \
+            UNICODE_DEGREE + ' / ' + \
+            str(int(round(data.temperature_high))) + \
+            UNICODE_DEGREE + temperature_letter
+    else:
+        temperature = str(int(round(data.temperature))) + \
+            UNICODE_DEGREE + temperature_letter
+    precip = str(int(round(data.precip_probability * 100))) + '%'
+
+    return Subwindow(label, temperature, precip, data.icon)
+
+
+def hour_label(timestamp, twelve_hour):
+    """
+    Returns a label such as '3 p.m.' or '15 hr' for the hour starting at
+    timestamp.
+    """
+    hour = datetime.datetime.fromtimestamp(timestamp)
+    if not twelve_hour:
+        return "{} {}".format(hour.hour, "hr")
+
+    if hour.hour <= 11:
+        ampm = 'a.m.'
+    else:
+        ampm = 'p.m.'
+    return "{} {}".format(int(hour.strftime("%I")), ampm)
+
+
+def umbrella_needed(weather):
+    # start with saying we don't need an umbrella
+    take_umbrella = False
+    icon_now = weather.current.icon
+    icon_today = weather.daily[0].icon
+    if icon_now == 'rain' or icon_today == 'rain':
+        take_umbrella = True
+    else:
+        # determine if an umbrella is needed during daylight hours
+        curr_date = datetime.datetime.today().date()
+        sr = datetime.datetime.fromtimestamp(weather.daily[0].sunrise_time)
+        ss = datetime.datetime.fromtimestamp(weather.daily[0].sunset_time)
+        for hour in weather.hourly:
+            hr = datetime.datetime.fromtimestamp(hour.time)
+            rain_chance = hour.precip_probability
+            is_today = hr.date() == curr_date
+            is_daylight_hr = hr >= sr and hr <= ss
+            if is_today and is_daylight_hr and rain_chance >= .25:
+                take_umbrella = True
+                break
+
+    return take_umbrella
+
+
+def deg_to_compass(degrees):
+    """
+    Convert numerical direction into the letters you'd see on a compas
+    such as 'N' for north or 'SE' for south east.
+    """
+    val = int((degrees/22.5)+.5)
+    dirs = ["N", "NNE", "NE", "ENE",
+            "E", "ESE", "SE", "SSE",
+            "S", "SSW", "SW", "WSW",
+            "W", "WNW", "NW", "NNW"]
+    return dirs[(val % 16)]
+
+
+def get_windspeed_abbreviation(unit):
+    """
+    Determines the abbreviation to use for wind speed based on the unit
+    a user has chosen (ca, uk2, us, si).
+    """
+    return get_abbreviation(units_decoder(unit)['windSpeed'])
+
+
+def get_temperature_letter(unit):
+    """
+    Determines the single letter that represents temperature based on
+    unit a user has chosen. ex: 'F' to represent 'Degrees Fahrenheit'
+    """
+    return units_decoder(unit)['temperature'].split(' ')[-1][0].upper()
+
+
+def get_abbreviation(phrase):
+    """
+    Create an abbreviation from a phrase by combining the first letter
+    of each word in lower case.
+    """
+    abbreviation = ''.join(item[0].lower() for item in phrase.split())
+    return abbreviation
+
+
+def units_decoder(units):
+    """
+    https://darksky.net/dev/docs has lists out what each
+    unit is. The method below is just a codified version
+    of what is on that page.
+    """
+    si_dict = {
+        'nearestStormDistance': 'Kilometers',
+        'precipIntensity': 'Millimeters per hour',
+        'precipIntensityMax': 'Millimeters per hour',
+        'precipAccumulation': 'Centimeters',
+        'temperature': 'Degrees Celsius',
+        'temperatureMin': 'Degrees Celsius',
+        'temperatureMax': 'Degrees Celsius',
+        'apparentTemperature': 'Degrees Celsius',
+        'dewPoint': 'Degrees Celsius',
+        'windSpeed': 'Meters per second',
+        'windGust': 'Meters per second',
+        'pressure': 'Hectopascals',
+        'visibility': 'Kilometers',
+    }
+    ca_dict = si_dict.copy()
+    ca_dict['windSpeed'] = 'Kilometers per hour'
+    ca_dict['windGust'] = 'Kilometers per hour'
+    uk2_dict = si_dict.copy()
+    uk2_dict['nearestStormDistance'] = 'Miles'
+    uk2_dict['visibility'] = 'Miles'
+    uk2_dict['windSpeed'] = 'Miles per hour'
+    uk2_dict['windGust'] = 'Miles per hour'
+    us_dict = {
+        'nearestStormDistance': 'Miles',
+        'precipIntensity': 'Inches per hour',
+        'precipIntensityMax': 'Inches per hour',
+        'precipAccumulation': 'Inches',
+        'temperature': 'Degrees Fahrenheit',
+        'temperatureMin': 'Degrees Fahrenheit',
+        'temperatureMax': 'Degrees Fahrenheit',
+        'apparentTemperature': 'Degrees Fahrenheit',
+        'dewPoint': 'Degrees Fahrenheit',
+        'windSpeed': 'Miles per hour',
+        'windGust': 'Miles per hour',
+        'pressure': 'Millibars',
+        'visibility': 'Miles',
+    }
+    switcher = {
+        'ca': ca_dict,
+        'uk2': uk2_dict,
+        'us': us_dict,
+        'si': si_dict,
+    }
+    return switcher.get(units, "Invalid unit name")
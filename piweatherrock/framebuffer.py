@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import mmap
+import os
+
+import pygame
+
+# Masks for the 16 bit RGB565 format used by most small Pi displays
+RGB565_MASKS = (0xF800, 0x07E0, 0x001F, 0)
+
+
+def read_geometry(device):
+    """
+    Returns (width, height, bits per pixel, stride) for a framebuffer
+    device such as /dev/fb0 from sysfs, or None if it isn't one.
+    """
+    sysfs = os.path.join("/sys/class/graphics", os.path.basename(device))
+    try:
+        with open(os.path.join(sysfs, "virtual_size"), "r") as f:
+            width, height = (int(n) for n in f.read().strip().split(","))
+        with open(os.path.join(sysfs, "bits_per_pixel"), "r") as f:
+            bpp = int(f.read().strip())
+        with open(os.path.join(sysfs, "stride"), "r") as f:
+            stride = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+    return (width, height, bpp, stride)
+
+
+class Framebuffer:
+    """
+    Draws straight into a memory mapped Linux framebuffer such as
+    /dev/fb0 so that no SDL video driver is needed. Any regular file can
+    stand in for the device, which makes it easy to try out on a machine
+    without a framebuffer.
+
+    Only the rects that changed are copied, and pixels are converted to
+    the framebuffer's format (XRGB8888 or RGB565) as they are copied.
+    For 32 bit framebuffers pygame blits directly into the mapped memory.
+    For 16 bit ones the rects are converted into a staging surface first
+    and then copied row by row.
+    """
+
+    def __init__(self, device, size=None, bpp=None, stride=None):
+        geometry = read_geometry(device)
+        if geometry is not None:
+            (width, height, bpp, stride) = geometry
+        elif size is None or bpp is None:
+            raise ValueError(f"{device} is not a framebuffer device so "
+                             "its size and bits per pixel must be given")
+        else:
+            (width, height) = size
+
+        if bpp not in (16, 32):
+            raise ValueError(f"Unsupported framebuffer depth: {bpp} bpp. "
+                             "Only RGB565 and XRGB8888 are supported.")
+
+        self.device = device
+        self.size = (width, height)
+        self.bpp = bpp
+        self.bytes_per_pixel = bpp // 8
+        self.stride = stride or width * self.bytes_per_pixel
+        length = self.stride * height
+
+        self.file = open(device, "r+b")
+        if os.path.isfile(device) and os.path.getsize(device) < length:
+            self.file.truncate(length)
+        self.map = mmap.mmap(self.file.fileno(), length)
+
+        if bpp == 32:
+            # A surface that shares memory with the framebuffer
+            surface = pygame.image.frombuffer(
+                self.map, (self.stride // 4, height), 'BGRA')
+            self.target = surface.subsurface((0, 0, width, height))
+            self.staging = None
+        else:
+            self.target = None
+            self.staging = pygame.Surface(self.size, 0, 16, RGB565_MASKS)
+
+    def write(self, surface, rects=None):
+        """
+        Copies rects of surface into the framebuffer, or all of it if no
+        rects are given.
+        """
+        bounds = pygame.Rect((0, 0), self.size)
+        if rects is None:
+            rects = [bounds]
+
+        rects = [bounds.clip(rect) for rect in rects]
+        rects = [rect for rect in rects if rect.width and rect.height]
+
+        if self.target is not None:
+            for rect in rects:
+                self.target.blit(surface, rect, rect)
+            return
+
+        for rect in rects:
+            self.staging.blit(surface, rect, rect)
+
+        # The staging surface stays locked while its memory is being read
+        # so it can only be blitted to before this.
+        pitch = self.staging.get_pitch()
+        with memoryview(self.staging.get_view('1')).cast('B') as pixels:
+            for rect in rects:
+                row_bytes = rect.width * self.bytes_per_pixel
+                src = rect.y * pitch + rect.x * self.bytes_per_pixel
+                dst = rect.y * self.stride + rect.x * self.bytes_per_pixel
+                for _ in range(rect.height):
+                    self.map[dst:dst + row_bytes] = \
+                        pixels[src:src + row_bytes]
+                    src += pitch
+                    dst += self.stride
+
+    def close(self):
+        self.target = None
+        self.staging = None
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import logging
+import pygame
+
+from os import path
+
+ICON_DIR = path.join(
+    path.dirname(__file__), 'plugin_weather_common', 'icons')
+
+# The layout of the icons inside of _spritesheet.png. Each icon sits in
+# its own cell with a 5 pixel margin on every side. _nt_spritesheet.png
+# uses the same layout for the 'nt_' version of each icon.
+SPRITE_LAYOUT = (
+    ('chanceflurries', 'chancerain', 'chancesleet', 'chancesnow', 'snow'),
+    ('chancetstorms', 'clear', 'cloudy', 'flurries', 'sunny'),
+    ('fog', 'hazy', 'mostlycloudy', 'mostlysunny', 'tstorms'),
+    ('partlycloudy', 'partlysunny', 'rain', 'sleet', 'unknown'),
+)
+SPRITE_MARGIN = 5
+
+
+class IconAtlas:
+    """
+    Provides the weather icons from the sprite sheets that ship in each
+    icon size folder. Each sheet is read from disk and converted to the
+    display's pixel format only once. After that, icons are handed out as
+    subsurfaces of the sheet so drawing a frame doesn't touch the disk.
+
+    Icons that are not on a sheet, such as the alternate wind icon, are
+    loaded from their own file the first time they are asked for and
+    then kept in memory.
+    """
+
+    def __init__(self):
+        self.icons = {}
+        self.loaded_sizes = set()
+        self.log = logging.getLogger(__name__)
+
+    def get(self, name, size):
+        """
+        Returns the icon called name (ex: 'clear' or 'nt_rain') at the
+        given size ('64' or '256').
+        """
+        size = str(size)
+        if size not in self.loaded_sizes:
+            self.load_sheets(size)
+
+        icon = self.icons.get((name, size))
+        if icon is None:
+            icon = pygame.image.load(self.icon_path(name, size)).convert_alpha()
+            self.icons[(name, size)] = icon
+
+        return icon
+
+    def load_sheets(self, size):
+        """
+        Cuts the day and night sprite sheets for a size into individual
+        icons.
+        """
+        self.loaded_sizes.add(size)
+        for sheet_name, prefix in (('_spritesheet.png', ''),
+                                   ('_nt_spritesheet.png', 'nt_')):
+            sheet_path = path.join(ICON_DIR, size, sheet_name)
+            try:
+                sheet = pygame.image.load(sheet_path).convert_alpha()
+            except (pygame.error, FileNotFoundError) as e:
+                self.log.debug(f"Unable to load {sheet_path}: {e}")
+                continue
+
+            cell = int(size) + SPRITE_MARGIN * 2
+            for row, names in enumerate(SPRITE_LAYOUT):
+                for column, name in enumerate(names):
+                    rect = pygame.Rect(column * cell + SPRITE_MARGIN,
+                                       row * cell + SPRITE_MARGIN,
+                                       int(size), int(size))
+                    self.icons[(prefix + name, size)] = sheet.subsurface(rect)
+
+    def icon_path(self, name, size):
+        """
+        Returns the path to the standalone file for an icon. The alternate
+        icons are used for anything that isn't part of the main set and
+        the 'unknown' icon for anything that isn't in either.
+        """
+        icon_path = path.join(ICON_DIR, size, f"{name}.png")
+        if not path.exists(icon_path):
+            icon_path = path.join(ICON_DIR, 'alt_icons', size, f"{name}.png")
+        if not path.exists(icon_path):
+            icon_path = path.join(ICON_DIR, size, "unknown.png")
+
+        return icon_path
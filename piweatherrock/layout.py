@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2014 Jim Kemp <kemp.jim@gmail.com>
+# Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+from collections import namedtuple
+from functools import reduce
+from operator import mul
+
+# Where something is drawn. Text is either started at x or centered on
+# it, depending on what is being drawn.
+Point = namedtuple('Point', ['x', 'y'])
+
+# Font heights, as factors that get multiplied into the screen height
+FONT_SIZES = {
+    'time': (0.115,),
+    'time_small': (0.075,),
+    'current_temp': (0.5 - 0.15, 0.6),
+    'current_temp_degree': (0.5 - 0.15, 0.3),
+    'summary': (0.04,),
+    'conditions': (0.05,),
+    'conditions_degree': (0.03,),
+    'umbrella': (0.04,),
+    'subwindow': (0.055,),
+    'subwindow_precip': (0.060,),
+}
+
+# Positions on the daily and hourly screens as (x, y) factors of the
+# screen width and height
+POINTS = {
+    'current_temp': ((0.27,), (0.20,)),
+    'summary': ((0.27,), (0.444,)),
+    'umbrella': ((0.52,), (0.444,)),
+}
+
+# Fixed pixel offsets from the top of the screen for the clock
+TIME_Y = 8
+TIME_SMALL_Y = 18
+
+# The rows of current conditions in the top right box
+CONDITIONS_Y = 0.17
+CONDITIONS_GAP = 0.065
+CONDITIONS_LABEL_X = 0.52
+CONDITIONS_VALUE_X = 0.69
+CONDITIONS_DEGREE_Y_OFFSET = 0.001
+CONDITIONS_LINES = 4
+
+# The four subwindows along the bottom. Each row is a number of line
+# gaps down from the top of the subwindows.
+SUBWINDOW_CENTERS = 0.125
+SUBWINDOW_COUNT = 4
+SUBWINDOW_Y = 0.530
+SUBWINDOW_GAP = 0.065
+SUBWINDOW_ROWS = {
+    'label': 0,
+    'icon': 1.2,
+    'temperature': 5,
+    'precip': 5.95,
+}
+
+# Lines of text on the info screen
+INFO_X = 0.05
+INFO_LINE_HEIGHT = 0.075
+INFO_LINES = 12
+
+# Left edge of the border around the weather screens
+BORDER_X = 10
+
+
+def scale(length, factors):
+    """
+    Multiplies length by each of factors in turn.
+    """
+    return reduce(mul, factors, length)
+
+
+class Layout:
+    """
+    Every position and font size used to draw the screens, worked out
+    once for a screen size. The tables above describe the layout in terms
+    of the screen's size so that nothing needs to change to support a new
+    one; drawing code just looks things up here by name.
+    """
+
+    def __init__(self, xmax, ymax):
+        self.xmax = xmax
+        self.ymax = ymax
+
+        self.fonts = {name: int(scale(ymax, factors))
+                      for name, factors in FONT_SIZES.items()}
+        self.points = {name: Point(scale(xmax, x), scale(ymax, y))
+                       for name, (x, y) in POINTS.items()}
+
+        self.time = Point(xmax / 2, TIME_Y)
+        self.time_small_y = TIME_SMALL_Y
+
+        # Each conditions line has a label, a value, and where a degree
+        # symbol goes if the value is a temperature.
+        self.conditions = []
+        for line in range(CONDITIONS_LINES):
+            y_start = CONDITIONS_Y + CONDITIONS_GAP * line
+            self.conditions.append((
+                Point(xmax * CONDITIONS_LABEL_X, ymax * y_start),
+                Point(xmax * CONDITIONS_VALUE_X, ymax * y_start),
+                ymax * (y_start + CONDITIONS_DEGREE_Y_OFFSET)))
+
+        self.subwindows = []
+        for index in range(SUBWINDOW_COUNT):
+            x = xmax * (SUBWINDOW_CENTERS * (index * 2 + 1))
+            self.subwindows.append({
+                name: Point(x, ymax * (SUBWINDOW_Y + SUBWINDOW_GAP * row))
+                for name, row in SUBWINDOW_ROWS.items()})
+
+        self.info_lines = [Point(xmax * INFO_X, ymax * INFO_LINE_HEIGHT * line)
+                           for line in range(INFO_LINES)]
+
+        self.weather_border = [
+            # Top
+            ((BORDER_X, 0), (xmax, 0)),
+            # Left
+            ((BORDER_X, 0), (BORDER_X, ymax)),
+            # Bottom
+            ((BORDER_X, ymax), (xmax, ymax)),
+            # Right
+            ((xmax, 0), (xmax, ymax + 2)),
+            # Bottom of top box
+            ((BORDER_X, ymax * 0.15), (xmax, ymax * 0.15)),
+            # Bottom of middle box
+            ((BORDER_X, ymax * 0.5), (xmax, ymax * 0.5)),
+            # Bottom row, left vertical
+            ((xmax * 0.25, ymax * 0.5), (xmax * 0.25, ymax)),
+            # Bottom row, center vertical
+            ((xmax * 0.5, ymax * 0.15), (xmax * 0.5, ymax)),
+            # Bottom row, right vertical
+            ((xmax * 0.75, ymax * 0.5), (xmax * 0.75, ymax)),
+        ]
+
+        self.info_border = [
+            ((BORDER_X, 0), (xmax, 0)),
+            ((BORDER_X, 0), (BORDER_X, ymax)),
+            ((BORDER_X, ymax), (xmax, ymax)),
+            ((xmax, 0), (xmax, ymax)),
+            ((BORDER_X, ymax * 0.15), (xmax, ymax * 0.15)),
+        ]
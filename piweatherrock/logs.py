@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import atexit
+import logging
+import logging.handlers
+import queue
+
+# The values allowed for 'log_level' in the config file
+LOG_LEVELS = {
+    'CRITICAL': logging.CRITICAL,
+    'ERROR': logging.ERROR,
+    'WARNING': logging.WARNING,
+    'INFO': logging.INFO,
+    'DEBUG': logging.DEBUG,
+}
+
+# How many records can be waiting to be written before new ones are dropped
+QUEUE_SIZE = 1000
+
+# Loggers that stop_logging() is already set to run for at exit
+stopped_at_exit = set()
+
+
+def parse_level(name):
+    """
+    Returns the logging level matching name, such as 'INFO'. Raises
+    ValueError if name isn't one of LOG_LEVELS.
+    """
+    level = LOG_LEVELS.get(str(name).upper())
+    if level is None:
+        raise ValueError(f"Unknown log level '{name}'. Use one of: "
+                         f"{', '.join(LOG_LEVELS)}")
+    return level
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands log records to a QueueListener so that formatting, writing, and
+    rotating the log file all happen on the listener's thread instead of
+    in the middle of drawing a frame.
+
+    The queue is bounded. If the disk falls so far behind that it fills
+    up, new records are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener = None
+
+    def prepare(self, record):
+        # Records never leave this process, so there is no need to format
+        # them here the way QueueHandler does. Leaving it for the listener
+        # keeps the cost of formatting tracebacks off the caller.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """
+    A QueueListener that waits for room in a full queue when stopping
+    instead of failing, so everything queued still gets written.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def start_logging(log, handler, queue_size=QUEUE_SIZE):
+    """
+    Sends everything logged to log through a bounded queue to handler,
+    which runs on a background thread. Returns the DroppingQueueHandler
+    attached to log. Anything still queued is written out at exit, however
+    many times logging is started.
+    """
+    queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+    queue_handler.listener = DrainingQueueListener(
+        queue_handler.queue, handler, respect_handler_level=True)
+    queue_handler.listener.start()
+    log.addHandler(queue_handler)
+
+    if log not in stopped_at_exit:
+        stopped_at_exit.add(log)
+        atexit.register(stop_logging, log)
+
+    return queue_handler
+
+
+def stop_logging(log):
+    """
+    Writes out anything still queued and removes the queue handlers that
+    start_logging() attached to log.
+    """
+    for handler in list(log.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            log.removeHandler(handler)
+            if handler.listener is not None:
+                handler.listener.stop()
+                for target in handler.listener.handlers:
+                    target.close()
+                handler.listener = None
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import os
+import threading
+import time
+
+from array import array
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+PREFIX = "piweatherrock"
+
+
+class Histogram:
+    """
+    Keeps the last size observations in a ring buffer so percentiles
+    reflect recent behaviour without the memory use growing. The count
+    and sum cover everything ever observed, which is what Prometheus
+    expects.
+    """
+
+    def __init__(self, size=512):
+        self.values = array('d', [0.0] * size)
+        self.next = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.values[self.next] = value
+        self.next = (self.next + 1) % len(self.values)
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, pct):
+        """
+        Returns the value pct percent of the way through the observations
+        in the buffer, or 0 if there aren't any yet.
+        """
+        recent = sorted(self.values[:min(self.count, len(self.values))])
+        if not recent:
+            return 0.0
+        return recent[min(len(recent) - 1,
+                          int(round(pct / 100 * (len(recent) - 1))))]
+
+
+class Metrics:
+    """
+    Timing spans, counters and gauges for the parts of the app that run
+    all the time. Spans and counters can be updated from any thread.
+    Gauges are functions that get called when the metrics are exported so
+    they always show the current value.
+    """
+
+    def __init__(self, histogram_size=512):
+        self.histogram_size = histogram_size
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        """
+        Times the code inside a with block and records it under name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = Histogram(self.histogram_size)
+                self.histograms[name] = histogram
+            histogram.observe(seconds)
+
+    def incr(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, func):
+        self.gauges[name] = func
+
+    def prometheus(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            if self.histograms:
+                lines.append(f"# TYPE {PREFIX}_span_seconds summary")
+            for name, histogram in sorted(self.histograms.items()):
+                for quantile in (50, 95, 99):
+                    lines.append(
+                        f'{PREFIX}_span_seconds{{span="{name}",'
+                        f'quantile="{quantile / 100}"}} '
+                        f'{histogram.percentile(quantile):.6f}')
+                lines.append(f'{PREFIX}_span_seconds_sum{{span="{name}"}} '
+                             f'{histogram.sum:.6f}')
+                lines.append(f'{PREFIX}_span_seconds_count{{span="{name}"}} '
+                             f'{histogram.count}')
+
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+                lines.append(f"{PREFIX}_{name}_total {value}")
+
+        for name, func in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            lines.append(f"{PREFIX}_{name} {func()}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """
+        Writes the metrics to path for node_exporter's textfile collector.
+        The file is replaced in one step so it is never read half written.
+        """
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_file, path)
+
+
+class StartupTimer:
+    """
+    Breaks down how long starting up takes. Each call to mark() records
+    the time since the one before it under the name of the step that just
+    finished. started can be an earlier time.perf_counter() value, such
+    as one taken before the slow imports.
+    """
+
+    def __init__(self, started=None):
+        if started is None:
+            started = time.perf_counter()
+        self.started = started
+        self.last = started
+        self.phases = []
+        self.finished = False
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def finish(self, phase, metrics=None):
+        """
+        Marks the last step and records every step in metrics as a
+        'startup_<phase>' span.
+        """
+        self.mark(phase)
+        self.finished = True
+        if metrics is not None:
+            for name, seconds in self.phases:
+                metrics.observe(f"startup_{name}", seconds)
+
+    def total(self):
+        return self.last - self.started
+
+    def report(self):
+        steps = ", ".join(
+            f"{phase} {seconds:.3f}s" for phase, seconds in self.phases)
+        return f"Started in {self.total():.3f}s ({steps})"
+
+
+class MetricsServer(threading.Thread):
+    """
+    Serves the metrics over http at /metrics so they can be scraped
+    without tailing logs.
+    """
+
+    def __init__(self, metrics, host, port):
+        super().__init__(name="metrics-server", daemon=True)
+        handler = type("MetricsHandler", (MetricsHandler,),
+                       {"metrics": metrics})
+        self.server = HTTPServer((host, port), handler)
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+
+        body = self.metrics.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes happen every few seconds and would flood the log
+        pass
@@ -7,81 +7,105 @@ import datetime
 import pygame
 import time
 
+from piweatherrock.plugins import Plugin
 
-class PluginInfo:
+
+class PluginInfo(Plugin):
     """
     Displays a screen providing information about this application
     along with the time of sunrise and sunset. The time and date are
     displayed in a different place than on the daily and hourly
     screens and there is no border. This is a conscious descison to
-    help prevent screen burn-in.
+    help prevent screen burn-in. The 'burn_in_*' settings protect every
+    screen by moving and dimming it slightly, so with those turned on
+    'info_delay' can be made longer.
     """
 
+    __slots__ = ('context', 'config', 'fonts', 'text', 'screen', 'weather',
+                 'last_update_check', 'layout', 'sunrise_string',
+                 'sunset_string', 'stale', 'attribution', 'minute', 'key',
+                 'draw_static')
+
     def __init__(self, weather_rock):
+        self.context = None
         self.config = None
+        self.fonts = None
+        self.text = None
         self.screen = None
         self.weather = None
         self.last_update_check = None
-        self.xmax = None
-        self.ymax = None
-        self.time_date_small_text_height = None
-        self.time_date_text_height = None
-        self.time_date_y_position = None
-        self.time_date_small_y_position = None
+        self.layout = None
         self.sunrise_string = None
         self.sunset_string = None
-
+        self.stale = None
+        self.attribution = None
+        self.minute = None
+        self.key = None
+        # Kept so that every frame hands the renderer the same object
+        self.draw_static = self.draw_info
+
+    def prepare(self, weather_rock):
         self.get_rock_values(weather_rock)
 
     def get_rock_values(self, weather_rock):
-        self.config = weather_rock.config
-        self.screen = weather_rock.screen
-        self.weather = weather_rock.weather
-        self.last_update_check = weather_rock.last_update_check
-        self.xmax = weather_rock.xmax
-        self.ymax = weather_rock.ymax
-        self.time_date_small_text_height = weather_rock.time_date_small_text_height
-        self.time_date_text_height = weather_rock.time_date_text_height
-        self.time_date_y_position = weather_rock.time_date_y_position
-        self.time_date_small_y_position = weather_rock.time_date_small_y_position
-        self.sunrise_string = weather_rock.sunrise_string
-        self.sunset_string = weather_rock.sunset_string
+        context = weather_rock.context
+        snapshot = context.snapshot
+        self.context = context
+        self.config = context.config
+        self.fonts = context.fonts
+        self.text = context.text
+        self.screen = context.screen
+        self.weather = snapshot.weather
+        self.last_update_check = snapshot.fetched_at
+        self.layout = context.layout
+        self.sunrise_string = snapshot.sunrise_string
+        self.sunset_string = snapshot.sunset_string
+        self.attribution = context.attribution
+        # Makes render() build a new key
+        self.minute = None
 
     def disp_info(self, weather_rock):
-        self.get_rock_values(weather_rock)
+        if self.context is not weather_rock.context:
+            self.prepare(weather_rock)
+        self.render(weather_rock)
+
+    def render(self, weather_rock):
+        # Nothing on this screen changes more than once a minute, apart
+        # from the cached forecast going out of date.
+        minute = int(time.time() // 60)
+        stale = weather_rock.is_stale()
+        if minute != self.minute or stale != self.stale:
+            self.minute = minute
+            self.stale = stale
+            self.key = ('info', self.context.forecast_version, minute, stale)
+
+        # draw_info() leaves self.screen pointing at the static layer
+        self.context.renderer.render(
+            self.context.screen, self.key, self.draw_static)
+
+    def draw_info(self, surface):
+        """
+        Draws the info screen onto surface.
+        """
+        self.screen = surface
 
         (in_daylight, day_hrs, day_mins, seconds_til_daylight,
          delta_seconds_til_dark) = self.daylight(self.weather)
 
-        # Fill the screen with black
-        self.screen.fill((0, 0, 0))
-        xmin = 10
         lines = 5
         line_color = (0, 0, 0)
         text_color = (255, 255, 255)
         font_name = "freesans"
 
         # Draw Screen Border
-        pygame.draw.line(self.screen, line_color,
-                         (xmin, 0), (self.xmax, 0), lines)
-        pygame.draw.line(self.screen, line_color,
-                         (xmin, 0), (xmin, self.ymax), lines)
-        pygame.draw.line(self.screen, line_color,
-                         (xmin, self.ymax), (self.xmax, self.ymax), lines)
-        pygame.draw.line(self.screen, line_color,
-                         (self.xmax, 0), (self.xmax, self.ymax), lines)
-        pygame.draw.line(self.screen, line_color,
-                         (xmin, self.ymax * 0.15),
-                         (self.xmax, self.ymax * 0.15), lines)
-
-        time_height_large = self.time_date_text_height
-        time_height_small = self.time_date_small_text_height
+        for start, end in self.layout.info_border:
+            pygame.draw.line(self.screen, line_color, start, end, lines)
 
         # Time & Date
-        regular_font = pygame.font.SysFont(
-            font_name, int(self.ymax * time_height_large), bold=1)
-        small_font = pygame.font.SysFont(
-            font_name, int(self.ymax * time_height_small), bold=1)
+        regular_font = self.fonts.get(
+            font_name, self.layout.fonts['time'], bold=1)
+        small_font = self.fonts.get(
+            font_name, self.layout.fonts['time_small'], bold=1)
 
         if self.config["12hour_disp"]:
             hours_and_minutes = time.strftime("%I:%M", time.localtime())
@@ -90,32 +114,32 @@ class PluginInfo:
             hours_and_minutes = time.strftime("%H:%M", time.localtime())
             am_pm = "hr"
 
-        rendered_hours_and_minutes = regular_font.render(
-            hours_and_minutes, True, text_color)
+        rendered_hours_and_minutes = self.text.render(
+            regular_font, hours_and_minutes, text_color)
         (tx1, ty1) = rendered_hours_and_minutes.get_size()
-        rendered_am_pm = small_font.render(am_pm, True, text_color)
+        rendered_am_pm = self.text.render(small_font, am_pm, text_color)
         (tx2, ty2) = rendered_am_pm.get_size()
 
-        tp = self.xmax / 2 - (tx1 + tx2) / 2
+        tp = self.layout.time.x - (tx1 + tx2) / 2
         self.screen.blit(rendered_hours_and_minutes,
-                         (tp, self.time_date_y_position))
+                         (tp, self.layout.time.y))
         self.screen.blit(rendered_am_pm,
-                         (tp + tx1 + 3, self.time_date_small_y_position))
+                         (tp + tx1 + 3, self.layout.time_small_y))
 
         self.string_print(
-            "A weather rock powered by Dark Sky", small_font,
-            self.xmax * 0.05, 3, text_color)
+            f"A weather rock powered by {self.attribution}", small_font,
+            3, text_color)
 
         self.string_print(
             "Sunrise: %s" % self.sunrise_string,
-            small_font, self.xmax * 0.05, 4, text_color)
+            small_font, 4, text_color)
 
         self.string_print(
             "Sunset:  %s" % self.sunset_string,
-            small_font, self.xmax * 0.05, 5, text_color)
+            small_font, 5, text_color)
 
         text = "Daylight: %d hrs %02d min" % (day_hrs, day_mins)
-        self.string_print(text, small_font, self.xmax * 0.05, 6, text_color)
+        self.string_print(text, small_font, 6, text_color)
 
         # leaving row 7 blank
 
@@ -125,12 +149,15 @@ class PluginInfo:
         else:
             text = "Sunrise in %d hrs %02d min" % self.stot(
                 seconds_til_daylight)
-        self.string_print(text, small_font, self.xmax * 0.05, 8, text_color)
+        self.string_print(text, small_font, 8, text_color)
 
         # leaving row 9 blank
 
-        text = "Weather checked at"
-        self.string_print(text, small_font, self.xmax * 0.05, 10, text_color)
+        if self.stale:
+            text = "Weather checked at (out of date)"
+        else:
+            text = "Weather checked at"
+        self.string_print(text, small_font, 10, text_color)
 
         if self.config["12hour_disp"]:
             text = "    %s" % time.strftime(
@@ -141,17 +168,14 @@ class PluginInfo:
                 "%H:%M:%S %Z on %a. %d %b %Y ",
                 time.localtime(self.last_update_check))
 
-        self.string_print(text, small_font, self.xmax * 0.05, 11, text_color)
-
-        # Update the display
-        pygame.display.update()
+        self.string_print(text, small_font, 11, text_color)
 
-    def string_print(self, text, font, x, line_number, text_color):
+    def string_print(self, text, font, line_number, text_color):
         """
         Prints a line of text on the display
         """
-        rendered_font = font.render(text, True, text_color)
-        self.screen.blit(rendered_font, (x, self.ymax * 0.075 * line_number))
+        rendered_font = self.text.render(font, text, text_color)
+        self.screen.blit(rendered_font, self.layout.info_lines[line_number])
 
     def daylight(self, weather):
         """
@@ -178,9 +202,9 @@ class PluginInfo:
 
         # Build a datetime variable from a unix timestamp for today's sunrise.
         tSunrise = datetime.datetime.fromtimestamp(
-            weather.daily[0].sunriseTime)
+            weather.daily[0].sunrise_time)
         tSunset = datetime.datetime.fromtimestamp(
-            weather.daily[0].sunsetTime)
+            weather.daily[0].sunset_time)
 
         # Test if current time is between sunrise and sunset.
         if (tNow > tSunrise) and (tNow < tSunset):
@@ -195,7 +219,7 @@ class PluginInfo:
                 # Must be evening - compute sunrise as time left today
                 # plus time from midnight tomorrow.
                 sunrise_tomorrow = datetime.datetime.fromtimestamp(
-                    weather.daily[1].sunriseTime)
+                    weather.daily[1].sunrise_time)
                 seconds_til_daylight = sunrise_tomorrow - tNow
             else:
                 # Else, must be early morning hours. Time to sunrise is
@@ -3,47 +3,57 @@
 # Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
 # Distributed under the MIT License (https://opensource.org/licenses/MIT)
 
-import datetime
-import pygame
-
 from piweatherrock.plugin_weather_common import PluginWeatherCommon
+from piweatherrock.plugins import Plugin
 
 
-class PluginWeatherDaily:
+class PluginWeatherDaily(Plugin):
     """
     This plugin is resposible for displaying the screen with the daily
     forecast.
     """
 
+    __slots__ = ('context', 'key', 'weather_common', 'draw_static',
+                 'draw_dynamic')
+
     def __init__(self, weather_rock):
-        self.screen = None
-        self.weather = None
+        self.context = None
+        self.key = None
         self.weather_common = None
-
-    def get_rock_values(self, weather_rock):
-        self.screen = weather_rock.screen
-        self.weather = weather_rock.weather
-        self.weather_common = PluginWeatherCommon(weather_rock)
+        # Kept so that every frame hands the renderer the same objects
+        self.draw_static = self.draw_daily
+        self.draw_dynamic = None
+
+    def prepare(self, weather_rock):
+        self.context = weather_rock.context
+        self.key = ('daily', self.context.forecast_version)
+        if self.weather_common is None:
+            self.weather_common = PluginWeatherCommon(weather_rock)
+            self.draw_dynamic = self.weather_common.disp_clock
+        else:
+            self.weather_common.get_rock_values(weather_rock)
 
     def disp_daily(self, weather_rock):
-        self.get_rock_values(weather_rock)
-
-        self.weather_common.disp_weather_top(weather_rock)
-
-        # Today
-        today = self.weather.daily[0]
-        today_string = "Today"
-        multiplier = 1
-        self.weather_common.display_subwindow(today, today_string, multiplier)
-
-        # counts from 0 to 2
-        for future_day in range(3):
-            this_day = self.weather.daily[future_day + 1]
-            this_day_no = datetime.datetime.fromtimestamp(this_day.time)
-            this_day_string = this_day_no.strftime("%A")
-            multiplier += 2
-            self.weather_common.display_subwindow(
-                this_day, this_day_string, multiplier)
-
-        # Update the display
-        pygame.display.update()
+        if self.context is not weather_rock.context:
+            self.prepare(weather_rock)
+        self.render(weather_rock)
+
+    def render(self, weather_rock):
+        # Only the clock is redrawn each second. Everything else is redrawn
+        # when there is a new forecast.
+        self.context.renderer.render(
+            self.context.screen, self.key, self.draw_static,
+            self.draw_dynamic)
+
+    def draw_daily(self, surface):
+        """
+        Draws everything but the time and date onto surface and returns
+        the rects of the border.
+        """
+        self.weather_common.screen = surface
+        borders = self.weather_common.disp_weather_top()
+
+        for index, window in enumerate(self.weather_common.view.daily):
+            self.weather_common.display_subwindow(window, index)
+
+        return borders
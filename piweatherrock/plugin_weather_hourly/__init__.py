@@ -3,71 +3,57 @@
 # Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
 # Distributed under the MIT License (https://opensource.org/licenses/MIT)
 
-import datetime
-import pygame
-
 from piweatherrock.plugin_weather_common import PluginWeatherCommon
+from piweatherrock.plugins import Plugin
 
 
-class PluginWeatherHourly:
+class PluginWeatherHourly(Plugin):
     """
     This plugin is resposible for displaying the screen with the hourly
     forecast.
     """
 
+    __slots__ = ('context', 'key', 'weather_common', 'draw_static',
+                 'draw_dynamic')
+
     def __init__(self, weather_rock):
-        self.config = None
-        self.screen = None
-        self.weather = None
+        self.context = None
+        self.key = None
         self.weather_common = None
-
-    def get_rock_values(self, weather_rock):
-        self.config = weather_rock.config
-        self.screen = weather_rock.screen
-        self.weather = weather_rock.weather
-        self.weather_common = PluginWeatherCommon(weather_rock)
-
-    def disp_hourly(self, weather_rock):
-        self.get_rock_values(weather_rock)
-
-        self.weather_common.disp_weather_top(weather_rock)
-
-        # Current hour
-        this_hour = self.weather.hourly[0]
-        this_hour_24_int = int(datetime.datetime.fromtimestamp(
-            this_hour.time).strftime("%H"))
-        if this_hour_24_int <= 11:
-            ampm = 'a.m.'
-        else:
-            ampm = 'p.m.'
-        this_hour_12_int = int(datetime.datetime.fromtimestamp(
-            this_hour.time).strftime("%I"))
-        if self.config["12hour_disp"]:
-            this_hour_string = "{} {}".format(str(this_hour_12_int), ampm)
+        # Kept so that every frame hands the renderer the same objects
+        self.draw_static = self.draw_hourly
+        self.draw_dynamic = None
+
+    def prepare(self, weather_rock):
+        self.context = weather_rock.context
+        self.key = ('hourly', self.context.forecast_version)
+        if self.weather_common is None:
+            self.weather_common = PluginWeatherCommon(weather_rock)
+            self.draw_dynamic = self.weather_common.disp_clock
         else:
-            this_hour_string = "{} {}".format(str(this_hour_24_int), "hr")
-        multiplier = 1
-        self.weather_common.display_subwindow(
-            this_hour, this_hour_string, multiplier)
+            self.weather_common.get_rock_values(weather_rock)
 
-        # counts from 0 to 2
-        for future_hour in range(3):
-            this_hour = self.weather.hourly[future_hour + 1]
-            this_hour_24_int = int(datetime.datetime.fromtimestamp(
-                this_hour.time).strftime("%H"))
-            if this_hour_24_int <= 11:
-                ampm = 'a.m.'
-            else:
-                ampm = 'p.m.'
-            this_hour_12_int = int(datetime.datetime.fromtimestamp(
-                this_hour.time).strftime("%I"))
-            if self.config["12hour_disp"]:
-                this_hour_string = "{} {}".format(str(this_hour_12_int), ampm)
-            else:
-                this_hour_string = "{} {}".format(str(this_hour_24_int), "hr")
-            multiplier += 2
-            self.weather_common.display_subwindow(
-                this_hour, this_hour_string, multiplier)
-
-        # Update the display
-        pygame.display.update()
+    def disp_hourly(self, weather_rock):
+        if self.context is not weather_rock.context:
+            self.prepare(weather_rock)
+        self.render(weather_rock)
+
+    def render(self, weather_rock):
+        # Only the clock is redrawn each second. Everything else is redrawn
+        # when there is a new forecast.
+        self.context.renderer.render(
+            self.context.screen, self.key, self.draw_static,
+            self.draw_dynamic)
+
+    def draw_hourly(self, surface):
+        """
+        Draws everything but the time and date onto surface and returns
+        the rects of the border.
+        """
+        self.weather_common.screen = surface
+        borders = self.weather_common.disp_weather_top()
+
+        for index, window in enumerate(self.weather_common.view.hourly):
+            self.weather_common.display_subwindow(window, index)
+
+        return borders
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import importlib
+import logging
+
+# Plugins that ship with PiWeatherRock, as 'module:class'. Other packages
+# can add their own under the ENTRY_POINT_GROUP entry point group.
+BUILTIN_PLUGINS = {
+    'daily': 'piweatherrock.plugin_weather_daily:PluginWeatherDaily',
+    'hourly': 'piweatherrock.plugin_weather_hourly:PluginWeatherHourly',
+    'info': 'piweatherrock.plugin_info:PluginInfo',
+}
+ENTRY_POINT_GROUP = 'piweatherrock.plugins'
+
+# Keys that jump straight to the built in screens. Any plugin can set
+# its own with 'key' in its config.
+DEFAULT_KEYS = {'daily': 'd', 'hourly': 'h', 'info': 'i'}
+
+# The screen shown every 'info_delay' seconds instead of taking a turn in
+# the rotation
+INTERLUDE = 'info'
+
+
+class RenderContext:
+    """
+    Everything the plugins draw with. The weather rock makes a new one
+    whenever the screen is resized or there is a new forecast, and never
+    changes one after that. A plugin only has to prepare again when
+    weather_rock.context is no longer the context it prepared with.
+    """
+
+    __slots__ = ('config', 'screen', 'renderer', 'fonts', 'text', 'icons',
+                 'layout', 'icon_size', 'forecast_version', 'snapshot',
+                 'attribution')
+
+    def __init__(self, weather_rock):
+        self.config = weather_rock.config
+        self.screen = weather_rock.screen
+        self.renderer = weather_rock.renderer
+        self.fonts = weather_rock.fonts
+        self.text = weather_rock.text
+        self.icons = weather_rock.icons
+        self.layout = weather_rock.layout
+        self.icon_size = weather_rock.icon_size
+        self.forecast_version = weather_rock.forecast_version
+        self.snapshot = weather_rock.snapshot
+        self.attribution = weather_rock.provider.attribution
+
+
+class Plugin:
+    """
+    A screen. The registry creates a plugin the first time it is shown
+    and then calls:
+
+    prepare() before its first render and whenever weather_rock.context
+    changes, to pick up whatever it needs from the new context.
+
+    render() every time the screen is drawn, normally once a second.
+
+    invalidate() when the screen has been resized. By default this
+    prepares the plugin again.
+
+    Plugins are created once and live as long as the app does, so
+    anything they hold should go in __slots__.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, weather_rock):
+        pass
+
+    def prepare(self, weather_rock):
+        pass
+
+    def render(self, weather_rock):
+        raise NotImplementedError
+
+    def invalidate(self, weather_rock):
+        self.prepare(weather_rock)
+
+
+def find_entry_points():
+    """
+    Returns the plugins other installed packages have registered, by name.
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        # Python 3.7 and older
+        return {}
+
+    found = entry_points()
+    if hasattr(found, 'select'):
+        found = found.select(group=ENTRY_POINT_GROUP)
+    else:
+        found = found.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point for entry_point in found}
+
+
+def load_class(target):
+    """
+    Imports and returns the class named by a 'module:class' string.
+    """
+    (module_name, class_name) = target.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class PluginRegistry:
+    """
+    Keeps track of the screens enabled in the 'plugins' section of the
+    config file and the order they are shown in.
+
+    Screens take turns in the order they are listed, each staying up for
+    its 'pause' seconds. The info screen is the exception: it interrupts
+    the rotation every 'info_delay' seconds for 'info_pause' seconds. It
+    is enabled unless the config says otherwise.
+
+    Nothing is imported or created for a plugin until it is first shown,
+    so disabled plugins cost nothing.
+    """
+
+    def __init__(self, weather_rock):
+        self.weather_rock = weather_rock
+        self.log = logging.getLogger(__name__)
+        self.plugins = {}
+        self.contexts = {}
+        self.rotation = []
+        self.pauses = {}
+        self.keys = {}
+        self.interlude = None
+        self.entry_points = None
+
+        config = weather_rock.config
+        settings = dict(config.get("plugins", {}))
+        settings.setdefault(INTERLUDE, {})
+        for name, plugin_config in settings.items():
+            if not plugin_config.get("enabled", True):
+                continue
+            if name == INTERLUDE:
+                self.interlude = name
+                self.pauses[name] = plugin_config.get(
+                    "pause", config["info_pause"])
+            else:
+                self.rotation.append(name)
+                self.pauses[name] = plugin_config.get("pause", 60)
+            key = plugin_config.get("key", DEFAULT_KEYS.get(name))
+            if key:
+                self.keys[key] = name
+
+        if not self.pauses:
+            raise ValueError("No plugins are enabled")
+
+        # Only look through installed packages when a plugin that isn't
+        # built in is configured.
+        if any(name not in BUILTIN_PLUGINS for name in self.pauses):
+            self.entry_points = find_entry_points()
+            for name in self.pauses:
+                if name not in BUILTIN_PLUGINS and \
+                        name not in self.entry_points:
+                    raise ValueError(f"Unknown plugin: {name}")
+
+    def first(self):
+        """
+        Returns the name of the screen to show on startup.
+        """
+        if self.rotation:
+            return self.rotation[0]
+        return self.interlude
+
+    def next(self, name):
+        """
+        Returns the name of the screen that comes after name.
+        """
+        if name not in self.rotation:
+            return self.first()
+        return self.rotation[
+            (self.rotation.index(name) + 1) % len(self.rotation)]
+
+    def get(self, name):
+        """
+        Returns the plugin called name, creating it if this is the first
+        time it's been asked for.
+        """
+        plugin = self.plugins.get(name)
+        if plugin is None:
+            plugin_class = self.load(name)
+            self.log.debug(f"Loaded plugin {name}")
+            plugin = plugin_class(self.weather_rock)
+            self.plugins[name] = plugin
+        return plugin
+
+    def load(self, name):
+        if name in BUILTIN_PLUGINS:
+            return load_class(BUILTIN_PLUGINS[name])
+        return self.entry_points[name].load()
+
+    def render(self, name):
+        """
+        Draws the screen called name, preparing it first if the context
+        has changed since it was last prepared.
+        """
+        plugin = self.get(name)
+        context = self.weather_rock.context
+        if self.contexts.get(name) is not context:
+            plugin.prepare(self.weather_rock)
+            self.contexts[name] = context
+        plugin.render(self.weather_rock)
+
+    def invalidate(self):
+        """
+        Lets every plugin that has been created know the screen was
+        resized.
+        """
+        for name, plugin in self.plugins.items():
+            plugin.invalidate(self.weather_rock)
+            self.contexts[name] = self.weather_rock.context
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import logging
+import os
+import time
+
+from collections import namedtuple
+
+from piweatherrock.forecast import is_missing
+
+# How bright the backlight is (0-100), how many seconds go by between
+# redraws, and whether the screen is blanked altogether
+PowerLevel = namedtuple('PowerLevel', [
+    'name', 'brightness', 'refresh', 'blank'])
+
+
+def import_gpio():
+    """
+    Returns RPi.GPIO, or GPIOmock when not running on a Pi.
+    """
+    try:
+        import RPi.GPIO as GPIO
+    except ImportError:
+        from piweatherrock import GPIOmock as GPIO
+    return GPIO
+
+
+def parse_clock(value):
+    """
+    Turns a time of day such as '23:30' into minutes past midnight.
+    """
+    (hours, minutes) = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def is_daylight(now, daily):
+    """
+    Returns True if now is between sunrise and sunset on any day of a
+    daily series. Days without a sunrise or sunset never match, so a
+    forecast without any counts as daylight all the time.
+    """
+    found = False
+    for sunrise, sunset in zip(daily.sunrise_time, daily.sunset_time):
+        if is_missing(sunrise) or is_missing(sunset):
+            continue
+        found = True
+        if sunrise <= now < sunset:
+            return True
+    return not found
+
+
+class PowerSchedule:
+    """
+    Picks the power level for any time of day. Quiet hours, if there are
+    any, come first. Otherwise it is day between sunrise and sunset and
+    night the rest of the time. Quiet hours can cross midnight, such as
+    23:00 to 06:00.
+    """
+
+    def __init__(self, day, night, quiet=None, quiet_start=None,
+                 quiet_end=None):
+        self.day = day
+        self.night = night
+        self.quiet = quiet
+        self.quiet_hours = None
+        if quiet is not None and quiet_start and quiet_end:
+            self.quiet_hours = (parse_clock(quiet_start),
+                                parse_clock(quiet_end))
+
+    def is_quiet(self, now):
+        if self.quiet_hours is None:
+            return False
+        local = time.localtime(now)
+        minute = local.tm_hour * 60 + local.tm_min
+        (start, end) = self.quiet_hours
+        if start <= end:
+            return start <= minute < end
+        return minute >= start or minute < end
+
+    def level(self, now, daily=None):
+        """
+        Returns the PowerLevel for now. daily is the forecast's daily
+        series, which is where sunrise and sunset come from. Without one
+        it is always day.
+        """
+        if self.is_quiet(now):
+            return self.quiet
+        if daily is not None and not is_daylight(now, daily):
+            return self.night
+        return self.day
+
+
+class SysfsBacklight:
+    """
+    A backlight under /sys/class/backlight, such as the official Pi
+    touchscreen's rpi_backlight.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "max_brightness"), "r") as f:
+            self.max_brightness = int(f.read().strip())
+
+    def set(self, brightness):
+        value = int(round(self.max_brightness * brightness / 100))
+        with open(os.path.join(self.path, "brightness"), "w") as f:
+            f.write(str(value))
+
+    def close(self):
+        pass
+
+
+class PwmBacklight:
+    """
+    A backlight driven by PWM on a GPIO pin, through RPi.GPIO or anything
+    with the same interface, such as GPIOmock.
+    """
+
+    def __init__(self, pin, frequency=1000, gpio=None):
+        self.gpio = gpio or import_gpio()
+        self.pin = pin
+        self.gpio.setmode(self.gpio.BCM)
+        self.gpio.setup(pin, self.gpio.OUT)
+        self.pwm = self.gpio.PWM(pin, frequency)
+        self.pwm.start(100)
+
+    def set(self, brightness):
+        self.pwm.ChangeDutyCycle(brightness)
+
+    def close(self):
+        self.pwm.stop()
+        self.gpio.cleanup(self.pin)
+
+
+class PowerManager:
+    """
+    Keeps the backlight and refresh rate in line with a PowerSchedule.
+
+    A key press or touch wakes the screen up at the day level for wake
+    seconds, whatever the schedule says.
+
+    How long is spent at each level is counted in metrics as
+    'power_<level>_seconds'. 'backlight_duty_seconds' counts seconds at
+    full brightness, so a backlight that is at half brightness for an
+    hour adds 1800. Comparing it with the time that went by shows how
+    much of the backlight's power the schedule saves.
+    """
+
+    def __init__(self, schedule, backlight=None, metrics=None, wake=0):
+        self.schedule = schedule
+        self.backlight = backlight
+        self.metrics = metrics
+        self.wake_seconds = wake
+        self.awake_until = 0
+        self.current = None
+        self.last = None
+        self.log = logging.getLogger(__name__)
+
+        if metrics is not None:
+            metrics.gauge("backlight_percent", lambda: (
+                self.backlight_level(self.current)))
+            metrics.gauge("refresh_seconds", lambda: (
+                self.current.refresh if self.current else 1))
+            metrics.gauge("display_blank", lambda: int(
+                bool(self.current and self.current.blank)))
+
+    @staticmethod
+    def backlight_level(level):
+        """
+        Returns how bright the backlight is at level, which is off when
+        the screen is blanked.
+        """
+        if level is None:
+            return 100
+        if level.blank:
+            return 0
+        return level.brightness
+
+    def wake(self, now):
+        self.awake_until = now + self.wake_seconds
+
+    def update(self, now, daily=None):
+        """
+        Works out the level for now and applies it. Returns
+        (level, changed) where changed is True when it differs from the
+        level used last time.
+        """
+        if now < self.awake_until:
+            level = self.schedule.day
+        else:
+            level = self.schedule.level(now, daily)
+
+        if self.metrics is not None and self.current is not None:
+            elapsed = max(0, now - self.last)
+            self.metrics.incr(f"power_{self.current.name}_seconds", elapsed)
+            self.metrics.incr(
+                "backlight_duty_seconds",
+                elapsed * self.backlight_level(self.current) / 100)
+        self.last = now
+
+        if level == self.current:
+            return (level, False)
+
+        self.log.info(f"Switching to {level.name} power: "
+                      f"{level.brightness}% brightness, redrawing every "
+                      f"{level.refresh}s{', blanked' if level.blank else ''}")
+        brightness = self.backlight_level(level)
+        if self.backlight is not None and (
+                self.current is None or
+                brightness != self.backlight_level(self.current)):
+            try:
+                self.backlight.set(brightness)
+            except OSError as e:
+                self.log.error(f"Unable to set the backlight: {e}")
+        self.current = level
+        return (level, True)
+
+    def close(self):
+        if self.backlight is not None:
+            self.backlight.close()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+from piweatherrock.providers.base import ForecastProvider
+from piweatherrock.providers.darksky import DarkSkyProvider
+from piweatherrock.providers.replay import ReplayProvider
+from piweatherrock.providers.service import ServiceProvider
+from piweatherrock.providers.synthetic import SyntheticProvider
+from piweatherrock.providers.wunderground import WundergroundProvider
+
+PROVIDERS = {
+    provider.name: provider for provider in (
+        DarkSkyProvider,
+        ReplayProvider,
+        SyntheticProvider,
+        WundergroundProvider,
+    )
+}
+
+
+def get_provider(config):
+    """
+    Creates the forecast provider named by the 'provider' setting in the
+    config file. Dark Sky is used when the setting is missing. When
+    'fetch_service' is set, forecasts for that provider come through the
+    shared fetch service instead.
+    """
+    name = config.get("provider", "darksky")
+    try:
+        provider = PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown forecast provider: {name}")
+
+    if config.get("fetch_service"):
+        return ServiceProvider(config, provider(config))
+    return provider(config)
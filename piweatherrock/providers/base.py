@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+
+class ForecastProvider:
+    """
+    A place forecasts come from. fetch() returns the provider's response
+    as plain json-able data so that it can be saved to the cache as is,
+    and parse() turns that data into a piweatherrock.forecast.Forecast.
+
+    Providers that support conditional requests keep the ETag and
+    Last-Modified values of their last response in 'etag' and
+    'last_modified'. Providers that hand out a forecast fetched earlier by
+    someone else, such as the fetch service, keep when it was fetched in
+    'fetched_at'. It is None when the forecast was fetched just now.
+    """
+
+    name = None
+    attribution = None
+
+    def __init__(self, config):
+        self.config = config
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = None
+
+    def fetch(self):
+        raise NotImplementedError
+
+    def parse(self, payload):
+        raise NotImplementedError
+
+    def remember(self, payload, etag=None, last_modified=None):
+        """
+        Seeds the provider with a previous response, such as one from the
+        on-disk cache.
+        """
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def close(self):
+        pass
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+from piweatherrock.forecast import Conditions, Forecast, MISSING, Series
+from piweatherrock.providers.base import ForecastProvider
+
+# Maps Dark Sky's icon names to the names of the icons in this project.
+ICON_NAMES = {
+    'clear-day': 'clear',
+    'clear-night': 'nt_clear',
+    'rain': 'rain',
+    'snow': 'snow',
+    'sleet': 'sleet',
+    'wind': 'wind',
+    'fog': 'fog',
+    'cloudy': 'cloudy',
+    'partly-cloudy-day': 'partlycloudy',
+    'partly-cloudy-night': 'nt_partlycloudy',
+}
+
+
+def icon_mapping(icon):
+    """
+    https://darksky.net/dev/docs has this to say about icons:
+    icon optional
+    A machine-readable text summary of this data point, suitable for
+    selecting an icon for display. If defined, this property will have one
+    of the following values: clear-day, clear-night, rain, snow, sleet,
+    wind, fog, cloudy, partly-cloudy-day, or partly-cloudy-night.
+    (Developers should ensure that a sensible default is defined, as
+    additional values, such as hail, thunderstorm, or tornado, may be
+    defined in the future.)
+
+    Based on that, this method will map the Dark Sky icon name to the name
+    of an icon in this project.
+    """
+    return ICON_NAMES.get(icon, 'unknown')
+
+
+class DarkSkyProvider(ForecastProvider):
+    """
+    Gets forecasts from the Dark Sky api.
+    """
+
+    name = 'darksky'
+    attribution = 'Dark Sky'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.client = None
+        self.remembered = None
+
+    def get_client(self):
+        """
+        Creates the api client the first time it's needed. requests is slow
+        to import, so this waits until the first fetch, which happens on
+        the fetcher thread once the screen is already up.
+        """
+        if self.client is None:
+            from piweatherrock.forecast_client import ForecastClient
+            self.client = ForecastClient(self.config["ds_api_key"])
+            if self.remembered is not None:
+                self.client.remember(*self.remembered)
+        return self.client
+
+    def fetch(self):
+        payload = self.get_client().fetch(
+            self.config["lat"],
+            self.config["lon"],
+            exclude='minutely',
+            units=self.config["units"],
+            lang=self.config["lang"])
+        self.etag = self.client.etag
+        self.last_modified = self.client.last_modified
+        return payload
+
+    def remember(self, payload, etag=None, last_modified=None):
+        super().remember(payload, etag, last_modified)
+        if self.client is None:
+            self.remembered = (payload, etag, last_modified)
+        else:
+            self.client.remember(payload, etag, last_modified)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+
+    def parse(self, payload):
+        return parse_response(payload)
+
+
+def parse_response(payload):
+    """
+    Turns a Dark Sky api response into a Forecast.
+    """
+    now = payload["currently"]
+    current = Conditions(
+        now["time"],
+        summary=now.get("summary", ''),
+        icon=icon_mapping(now.get("icon")),
+        temperature=now["temperature"],
+        apparent_temperature=now.get(
+            "apparentTemperature", now["temperature"]),
+        humidity=now.get("humidity", MISSING),
+        wind_speed=now.get("windSpeed", MISSING),
+        wind_bearing=now.get("windBearing", MISSING),
+        precip_probability=now.get("precipProbability", 0.0))
+
+    hourly = Series()
+    for hour in payload.get("hourly", {}).get("data", []):
+        hourly.append(
+            hour["time"],
+            icon=icon_mapping(hour.get("icon")),
+            summary=hour.get("summary", ''),
+            temperature=hour.get("temperature", MISSING),
+            precip_probability=hour.get("precipProbability", 0.0))
+
+    daily = Series()
+    for day in payload.get("daily", {}).get("data", []):
+        daily.append(
+            day["time"],
+            icon=icon_mapping(day.get("icon")),
+            summary=day.get("summary", ''),
+            temperature_low=day.get("temperatureLow", MISSING),
+            temperature_high=day.get("temperatureHigh", MISSING),
+            precip_probability=day.get("precipProbability", 0.0),
+            sunrise_time=day.get("sunriseTime", MISSING),
+            sunset_time=day.get("sunsetTime", MISSING))
+
+    return Forecast(current, hourly, daily)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import glob
+import json
+import os
+import time
+
+from piweatherrock.providers.base import ForecastProvider
+from piweatherrock.providers.darksky import parse_response
+
+# The Dark Sky fields that hold unix timestamps
+TIME_FIELDS = ('time', 'sunriseTime', 'sunsetTime')
+
+
+class ReplayProvider(ForecastProvider):
+    """
+    Plays back recorded Dark Sky responses from disk without using the
+    network or any api quota. 'provider_path' can point to a single json
+    file or to a directory of them, in which case each fetch returns the
+    next file in name order and starts over after the last one.
+
+    Recordings are moved forward in time so that they always look like the
+    forecast for right now.
+    """
+
+    name = 'replay'
+    attribution = 'recorded forecasts'
+
+    def __init__(self, config):
+        super().__init__(config)
+        path = os.path.expanduser(config["provider_path"])
+        if os.path.isdir(path):
+            self.files = sorted(glob.glob(os.path.join(path, "*.json")))
+        else:
+            self.files = [path]
+        self.next_file = 0
+
+    def fetch(self):
+        if not self.files:
+            raise FileNotFoundError("No recorded forecasts to replay")
+
+        file_name = self.files[self.next_file]
+        self.next_file = (self.next_file + 1) % len(self.files)
+        with open(file_name, "r") as f:
+            payload = json.load(f)
+
+        return rebase(payload, time.time())
+
+    def parse(self, payload):
+        return parse_response(payload)
+
+
+def shift(points, offset):
+    """
+    Adds offset seconds to every timestamp in points.
+    """
+    if offset == 0:
+        return
+    for point in points:
+        for field in TIME_FIELDS:
+            if field in point:
+                point[field] += offset
+
+
+def rebase(payload, now):
+    """
+    Shifts the timestamps in a Dark Sky response so that it lines up with
+    now. The current conditions and the hourly forecast move so the first
+    hour is the current hour. The daily forecast moves by whole days so
+    that now falls on its first day.
+    """
+    hourly = payload.get("hourly", {}).get("data", [])
+    if hourly:
+        first_hour = hourly[0]["time"]
+    else:
+        first_hour = payload["currently"]["time"] // 3600 * 3600
+    shift([payload["currently"]] + hourly,
+          int(now) // 3600 * 3600 - first_hour)
+
+    daily = payload.get("daily", {}).get("data", [])
+    if daily:
+        shift(daily, int((now - daily[0]["time"]) // 86400) * 86400)
+
+    return payload
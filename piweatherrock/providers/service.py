@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import json
+import socket
+
+from piweatherrock.fetch_service import FIRST_FETCH_TIMEOUT, LOCATION_KEYS
+from piweatherrock.providers.base import ForecastProvider
+
+
+class ServiceProvider(ForecastProvider):
+    """
+    Gets forecasts from a shared fetch service (see pwr-fetch-service)
+    over the Unix socket named by 'fetch_service' instead of calling the
+    api directly. The service fetches for the provider named in the
+    config, and that provider still parses the responses so they look
+    exactly like they came from it.
+    """
+
+    def __init__(self, config, upstream):
+        super().__init__(config)
+        self.upstream = upstream
+        self.name = upstream.name
+        self.attribution = upstream.attribution
+        self.socket_path = config["fetch_service"]
+
+    def fetch(self):
+        request = {key: self.config[key]
+                   for key in LOCATION_KEYS if key in self.config}
+        request.setdefault("provider", self.upstream.name)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(FIRST_FETCH_TIMEOUT + 10)
+            sock.connect(self.socket_path)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                response = json.loads(f.readline())
+
+        if "error" in response:
+            raise OSError(f"Fetch service: {response['error']}")
+
+        self.etag = response.get("etag")
+        self.last_modified = response.get("last_modified")
+        self.fetched_at = response.get("fetched_at")
+        return response["data"]
+
+    def parse(self, payload):
+        return self.upstream.parse(payload)
+
+    def close(self):
+        self.upstream.close()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import datetime
+import math
+import random
+import time
+
+from piweatherrock.providers.base import ForecastProvider
+from piweatherrock.providers.darksky import parse_response
+
+ICONS = ('clear-day', 'partly-cloudy-day', 'cloudy', 'rain', 'sleet',
+         'snow', 'wind', 'fog', 'clear-night', 'partly-cloudy-night')
+
+
+class SyntheticProvider(ForecastProvider):
+    """
+    Makes up a plausible forecast in the shape of a Dark Sky response.
+    Every fetch returns a different forecast so that it can be used to
+    exercise the whole rendering pipeline, at any fetch rate, without a
+    network connection or an api key.
+    """
+
+    name = 'synthetic'
+    attribution = 'synthetic forecasts'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.fetch_count = 0
+
+    def fetch(self):
+        self.fetch_count += 1
+        return generate(time.time(), random.Random(self.fetch_count))
+
+    def parse(self, payload):
+        return parse_response(payload)
+
+
+def generate(now, rng):
+    """
+    Returns a made up Dark Sky style response for 48 hours and 8 days
+    starting at now.
+    """
+    midnight = datetime.datetime.fromtimestamp(now).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    today = midnight.timestamp()
+    base_temp = rng.uniform(20, 80)
+
+    def temperature(when):
+        # Coldest around 4 am and warmest around 4 pm
+        hour = (when - today) / 3600
+        return base_temp + 12 * math.sin((hour - 10) * math.pi / 12)
+
+    hourly = []
+    first_hour = now - now % 3600
+    for hour in range(49):
+        when = first_hour + hour * 3600
+        hourly.append({
+            "time": int(when),
+            "summary": "Synthetic",
+            "icon": rng.choice(ICONS),
+            "precipProbability": round(rng.random(), 2),
+            "temperature": round(temperature(when), 2),
+        })
+
+    daily = []
+    for day in range(8):
+        start = (midnight + datetime.timedelta(days=day)).timestamp()
+        low = base_temp - 12 + rng.uniform(-5, 5)
+        daily.append({
+            "time": int(start),
+            "summary": "Synthetic",
+            "icon": rng.choice(ICONS[:8]),
+            "sunriseTime": int(start + 6.5 * 3600),
+            "sunsetTime": int(start + 18.5 * 3600),
+            "precipProbability": round(rng.random(), 2),
+            "temperatureLow": round(low, 2),
+            "temperatureHigh": round(low + rng.uniform(10, 30), 2),
+        })
+
+    current = dict(hourly[0])
+    current.update({
+        "time": int(now),
+        "summary": "Synthetic conditions",
+        "temperature": round(temperature(now), 2),
+        "apparentTemperature": round(temperature(now) - 2, 2),
+        "humidity": round(rng.uniform(0.2, 1), 2),
+        "windSpeed": round(rng.uniform(0, 30), 2),
+        "windBearing": rng.randrange(360),
+    })
+
+    return {
+        "currently": current,
+        "hourly": {"data": hourly},
+        "daily": {"data": daily},
+    }
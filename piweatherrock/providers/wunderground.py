@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import datetime
+import json
+import os
+
+from piweatherrock.forecast import Conditions, Forecast, MISSING, Series
+from piweatherrock.providers.base import ForecastProvider
+
+
+class WundergroundProvider(ForecastProvider):
+    """
+    Reads forecasts in the format of the retired Weather Underground api,
+    which is what PiWeatherRock originally used. 'provider_path' points to
+    a saved response such as example/wunderground_full_response.json.
+    """
+
+    name = 'wunderground'
+    attribution = 'Weather Underground'
+
+    def fetch(self):
+        with open(os.path.expanduser(self.config["provider_path"]), "r") as f:
+            return json.load(f)
+
+    def parse(self, payload):
+        return parse_response(payload, self.config["units"])
+
+
+def parse_response(payload, units):
+    """
+    Turns a Weather Underground api response into a Forecast using the
+    Dark Sky style units setting (ca, uk2, us, si).
+    """
+    imperial = units == 'us'
+    obs = payload["current_observation"]
+    tz = parse_offset(obs.get("local_tz_offset", "+0000"))
+
+    if imperial:
+        temperature = float(obs["temp_f"])
+        feels_like = float(obs.get("feelslike_f", obs["temp_f"]))
+    else:
+        temperature = float(obs["temp_c"])
+        feels_like = float(obs.get("feelslike_c", obs["temp_c"]))
+
+    current = Conditions(
+        int(obs["observation_epoch"]),
+        summary=obs.get("weather", ''),
+        icon=icon_name(obs),
+        temperature=temperature,
+        apparent_temperature=feels_like,
+        humidity=parse_percent(obs.get("relative_humidity")),
+        wind_speed=wind_speed(obs.get("wind_mph"), obs.get("wind_kph"), units),
+        wind_bearing=float(obs.get("wind_degrees", MISSING)))
+
+    hourly = Series()
+    for hour in payload.get("hourly_forecast", []):
+        if imperial:
+            hour_temp = float(hour["temp"]["english"])
+        else:
+            hour_temp = float(hour["temp"]["metric"])
+        hourly.append(
+            int(hour["FCTTIME"]["epoch"]),
+            icon=icon_name(hour),
+            summary=hour.get("condition", ''),
+            temperature=hour_temp,
+            precip_probability=parse_percent(hour.get("pop")))
+    if not len(hourly):
+        # Without the hourly feature, the best we have is right now
+        hourly.append(current.time, icon=current.icon,
+                      summary=current.summary, temperature=temperature)
+
+    sun_phase = payload.get("sun_phase", {})
+    daily = Series()
+    forecast_days = payload.get("forecast", {}).get(
+        "simpleforecast", {}).get("forecastday", [])
+    for day in forecast_days:
+        date = day["date"]
+        if imperial:
+            low = float(day["low"]["fahrenheit"])
+            high = float(day["high"]["fahrenheit"])
+        else:
+            low = float(day["low"]["celsius"])
+            high = float(day["high"]["celsius"])
+        daily.append(
+            int(date["epoch"]),
+            icon=icon_name(day),
+            summary=day.get("conditions", ''),
+            temperature_low=low,
+            temperature_high=high,
+            precip_probability=parse_percent(day.get("pop")),
+            sunrise_time=sun_time(sun_phase.get("sunrise"), date, tz),
+            sunset_time=sun_time(sun_phase.get("sunset"), date, tz))
+
+    return Forecast(current, hourly, daily)
+
+
+def icon_name(item):
+    """
+    Weather Underground's icon names match the icons in this project. The
+    night versions are only called out in the icon url.
+    """
+    icon = item.get("icon") or 'unknown'
+    if '/nt_' in item.get("icon_url", '') and not icon.startswith('nt_'):
+        icon = f"nt_{icon}"
+    return icon
+
+
+def parse_percent(value):
+    """
+    Turns values like '78%', '40', or 40 into a fraction like 0.4.
+    """
+    if value in (None, ''):
+        return 0.0
+    return float(str(value).rstrip('%')) / 100
+
+
+def parse_offset(offset):
+    """
+    Turns a utc offset like '-0800' into a timezone.
+    """
+    sign = -1 if offset.startswith('-') else 1
+    digits = offset.lstrip('+-')
+    minutes = int(digits[:2]) * 60 + int(digits[2:4])
+    return datetime.timezone(datetime.timedelta(minutes=sign * minutes))
+
+
+def sun_time(phase, date, tz):
+    """
+    Turns a sunrise or sunset hour and minute into a unix timestamp on the
+    given forecast day.
+    """
+    if not phase:
+        return MISSING
+    when = datetime.datetime(
+        int(date["year"]), int(date["month"]), int(date["day"]),
+        int(phase["hour"]), int(phase["minute"]), tzinfo=tz)
+    return when.timestamp()
+
+
+def wind_speed(mph, kph, units):
+    if units in ('us', 'uk2'):
+        return float(mph) if mph is not None else MISSING
+    if kph is None:
+        return MISSING
+    if units == 'si':
+        return float(kph) / 3.6
+    return float(kph)
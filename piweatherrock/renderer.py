@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import time
+
+import pygame
+
+from piweatherrock.metrics import Metrics
+
+
+def snake(shift):
+    """
+    Returns every offset up to shift pixels from the middle in each
+    direction, in an order where each one is a single pixel from the
+    last.
+    """
+    offsets = []
+    for row, dy in enumerate(range(-shift, shift + 1)):
+        dxs = range(-shift, shift + 1)
+        if row % 2:
+            dxs = reversed(dxs)
+        offsets.extend((dx, dy) for dx in dxs)
+    return offsets
+
+
+class BurnInSchedule:
+    """
+    Works out how the finished frame is moved and dimmed at any time to
+    keep anything from sitting on the same pixels for too long.
+
+    Every interval seconds the frame moves by one pixel, wandering up to
+    shift pixels from where it belongs and back again. Lines that never
+    change, such as the borders, are shown at border_dim times their
+    brightness for every other border_interval seconds. Both only depend
+    on the time, so there is nothing to keep track of.
+    """
+
+    def __init__(self, shift=2, interval=60, border_dim=1.0,
+                 border_interval=1800):
+        path = snake(shift)
+        # There and back again without repeating either end
+        self.offsets = path + path[-2:0:-1]
+        self.interval = interval
+        self.border_level = max(0, min(255, int(round(border_dim * 255))))
+        self.border_interval = border_interval
+
+    def state(self, now):
+        """
+        Returns ((x, y) offset, border brightness out of 255) for now.
+        """
+        offset = self.offsets[int(now // self.interval) % len(self.offsets)]
+        if self.border_level < 255 and int(now // self.border_interval) % 2:
+            return (offset, self.border_level)
+        return (offset, 255)
+
+
+class LayeredRenderer:
+    """
+    Splits a screen into a static layer and the small parts of it that
+    change over time, such as the clock.
+
+    The static layer is drawn into an offscreen surface only when its key
+    changes. The key is made up of whatever the static content depends
+    on, such as the screen being shown and the forecast version. On every
+    other tick the dynamic parts are given the chance to update
+    themselves, and only the areas they changed are pushed to the
+    display.
+
+    With a BurnInSchedule, frames are put together offscreen and copied
+    to the screen moved and dimmed as the schedule says. Moving or
+    dimming is one copy of that frame, so the plugins never have to draw
+    anything again for it.
+
+    Frames are pushed to the display with update, which takes an optional
+    list of rects just like pygame.display.update. Time spent doing that
+    is recorded in metrics as 'display_update'.
+    """
+
+    def __init__(self, metrics=None, update=pygame.display.update,
+                 schedule=None):
+        self.metrics = metrics or Metrics()
+        self.update = update
+        self.schedule = schedule
+        self.static_layer = None
+        self.static_key = None
+        self.frame = None
+        self.borders = []
+        self.state = ((0, 0), 255)
+        self.full_updates = 0
+        self.partial_updates = 0
+
+    def invalidate(self):
+        """
+        Forces the static layer to be redrawn on the next render. This is
+        needed any time something else has drawn on the screen or the
+        screen has been resized.
+        """
+        self.static_key = None
+
+    def render(self, screen, key, draw_static, draw_dynamic=None):
+        """
+        Renders a frame onto screen.
+
+        draw_static is called with the offscreen surface to draw on when
+        key differs from the one used for the current static layer. It can
+        return the rects of lines that never change, such as borders, so
+        that they can be dimmed now and then.
+
+        draw_dynamic is called on every render as
+        draw_dynamic(frame, background, redraw). background is the static
+        layer, for putting back whatever was underneath something that
+        moved or changed. redraw is True when the static layer has just
+        been copied to the frame, so everything has to be drawn again.
+        It returns a list of the rects it changed, which is empty when
+        nothing did.
+        """
+        size = screen.get_size()
+        if self.schedule is None:
+            frame = screen
+        else:
+            if self.frame is None or self.frame.get_size() != size:
+                self.frame = pygame.Surface(size).convert()
+                self.static_key = None
+            frame = self.frame
+
+        if (key != self.static_key or self.static_layer is None or
+                self.static_layer.get_size() != size):
+            if self.static_layer is None or self.static_layer.get_size() != size:
+                self.static_layer = pygame.Surface(size).convert()
+            self.static_layer.fill((0, 0, 0))
+            self.borders = draw_static(self.static_layer) or []
+            self.static_key = key
+
+            frame.blit(self.static_layer, (0, 0))
+            if draw_dynamic is not None:
+                draw_dynamic(frame, self.static_layer, True)
+            self.present(screen, frame)
+            return
+
+        rects = []
+        if draw_dynamic is not None:
+            rects = draw_dynamic(frame, self.static_layer, False)
+
+        if frame is not screen:
+            if self.schedule.state(time.time()) != self.state:
+                self.present(screen, frame)
+                return
+            rects = [self.copy(screen, frame, rect) for rect in rects]
+
+        if not rects:
+            return
+        self.partial_updates += 1
+        with self.metrics.span("display_update"):
+            self.update(rects)
+
+    def present(self, screen, frame):
+        """
+        Pushes the whole of frame to the display, moving and dimming it
+        first if there is a schedule.
+        """
+        if frame is not screen:
+            self.state = self.schedule.state(time.time())
+            screen.fill((0, 0, 0))
+            self.copy(screen, frame, frame.get_rect())
+
+        self.full_updates += 1
+        with self.metrics.span("display_update"):
+            self.update()
+
+    def copy(self, screen, frame, rect):
+        """
+        Copies rect of frame to where it belongs on screen right now and
+        returns the rect of screen that changed.
+        """
+        (offset, border_level) = self.state
+        moved = screen.blit(frame, rect.move(offset), rect)
+        if border_level < 255:
+            dim = (border_level, border_level, border_level)
+            for border in self.borders:
+                overlap = border.clip(rect)
+                if overlap:
+                    screen.fill(dim, overlap.move(offset),
+                                special_flags=pygame.BLEND_MULT)
+        return moved
@@ -3,219 +3,258 @@
 # Copyright (c) 2017 Gene Liverman <gene@technicalissues.us>
 # Distributed under the MIT License (https://opensource.org/licenses/MIT)
 
-import json
+import math
 import pygame
-import sys
 import time
 
 # pylint is mad about thise locals regardless of how they are used. with
 # that being the case, I decided to have the lint error here instead of
 # every place they get used. PR's welcome to make pylint happy about this
 # and pygame.quit()
-from pygame.locals import QUIT, VIDEORESIZE, KEYDOWN, K_KP_ENTER, K_q, K_d, K_h, K_i, K_s
+from pygame.locals import QUIT, VIDEORESIZE, KEYDOWN, MOUSEBUTTONDOWN, NOEVENT, K_KP_ENTER, K_q, K_s
 
 # local imports
+from piweatherrock.metrics import StartupTimer
+from piweatherrock.plugins import PluginRegistry
 from piweatherrock.weather import Weather
-from piweatherrock.plugin_weather_daily import PluginWeatherDaily
-from piweatherrock.plugin_weather_hourly import PluginWeatherHourly
-from piweatherrock.plugin_info import PluginInfo
 
 
 class Runner:
 
     def __init__(self):
         self.current_screen = None
-        self.d_count = 1
-        self.h_count = 0
         self.running = False
-        self.seconds = 0
-        self.non_weather_timeout = 0
-        self.periodic_info_activation = 0
+        self.tick = None
+        self.power = None
+        self.last_frame = None
+        self.screen_since = 0
+        self.weather_since = 0
         self.config = None
         self.my_weather_rock = None
-        self.daily = None
-        self.hourly = None
-        self.info = None
+        self.plugins = None
+        self.startup = None
 
-    def main(self, config_file):
-        with open(config_file, "r") as f:
-            self.config = json.load(f)
-
-        # Create an instance of the main application class
-        self.my_weather_rock = Weather(config_file)
+    def main(self, config_file, started=None):
+        """
+        Runs the display until it is told to quit. started is when the
+        program started, from time.perf_counter(), so that the time spent
+        importing shows up in the startup report.
+        """
+        self.startup = StartupTimer(started)
+        self.startup.mark("imports")
 
-        # Create an instance of each plugin that will be used
-        self.daily = PluginWeatherDaily(self.my_weather_rock)
-        self.hourly = PluginWeatherHourly(self.my_weather_rock)
-        self.info = PluginInfo(self.my_weather_rock)
+        # Create an instance of the main application class. A cached
+        # forecast, if there is one, goes up right away. Otherwise the
+        # fetcher gets the first one once the screen is up.
+        self.my_weather_rock = Weather(
+            config_file, startup=self.startup, fetch=False)
+        self.config = self.my_weather_rock.config
 
-        # Default to weather mode. Showing daily weather first.
-        self.current_screen = 'd'
+        # Plugins are only loaded once they are shown
+        self.plugins = PluginRegistry(self.my_weather_rock)
 
-        self.d_count = 1
-        self.h_count = 0
+        # Start with the first screen in the rotation
+        self.show_screen(self.plugins.first(), time.time())
 
         # Stay running while True
         self.running = True
 
-        # Seconds Placeholder to pace display
-        self.seconds = 0
-
-        # Display timeout to automatically switch back to weather display.
-        self.non_weather_timeout = 0
+        if self.my_weather_rock.forecast_version == 0:
+            self.my_weather_rock.log.info(
+                "No cached forecast. Waiting for the first fetch.")
 
-        # Switch to info periodically to prevent screen burn.
-        self.periodic_info_activation = 0
-
-        # Loads data from darksky.net
-        if not self.my_weather_rock.get_forecast():
-            self.my_weather_rock.log.exception(
-                "Error: no data from darksky.net.")
-            self.running = False
+        # Keep the forecast fresh from here on without blocking the UI
+        self.my_weather_rock.start_fetcher()
+        self.my_weather_rock.start_metrics()
+        self.my_weather_rock.start_frame_writer()
 
         ##################################################################
         #                        Main progam loop                        #
         ##################################################################
         while self.running:
-            # Look for and process keyboard events to change modes.
-            self.process_pygame_events()
-            self.screen_switcher()
+            self.check_forecast()
+            with self.my_weather_rock.metrics.span("screen_switcher"):
+                self.screen_switcher(time.time())
+            if not self.startup.finished:
+                self.startup.finish("first_frame",
+                                    self.my_weather_rock.metrics)
+                self.my_weather_rock.log.info(self.startup.report())
+            self.my_weather_rock.export_metrics(time.time())
+            self.my_weather_rock.export_frame(time.time())
+
+            # Sleep until the next thing needs doing or an event arrives.
+            timeout = self.next_deadline(time.time()) - time.time()
+            event = pygame.event.wait(max(1, math.ceil(timeout * 1000)))
 
-            # Loop timer.
-            pygame.time.wait(100)
+            # Look for and process keyboard events to change modes.
+            self.process_pygame_events(event)
 
         # When the main program loop is exited, exit the application
+        self.my_weather_rock.stop_fetcher()
+        self.my_weather_rock.stop_metrics()
+        self.my_weather_rock.stop_frame_writer()
+        self.my_weather_rock.power.close()
         pygame.quit()
 
-    def process_pygame_events(self):
+    def process_pygame_events(self, first_event=None):
         """
         pygame events are how we learn about a window being closed or
         resized or a key being pressed. This function looks for the events
         we care about and reacts when needed.
         """
+        events = pygame.event.get()
+        if first_event is not None and first_event.type != NOEVENT:
+            events.insert(0, first_event)
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == QUIT:
                 self.running = False
             elif event.type == VIDEORESIZE:
                 self.my_weather_rock.sizing(event.size)
+                self.plugins.invalidate()
+                self.tick = None
+            elif event.type == MOUSEBUTTONDOWN:
+                # Touching the screen wakes it up
+                self.my_weather_rock.power.wake(time.time())
             elif event.type == KEYDOWN:
+                self.my_weather_rock.power.wake(time.time())
 
                 # On 'q' or keypad enter key, quit the program.
                 if ((event.key == K_KP_ENTER) or (event.key == K_q)):
                     self.running = False
 
-                # On 'd' key, set mode to 'daily weather'.
-                elif event.key == K_d:
-                    self.current_screen = 'd'
-                    self.d_count = 1
-                    self.h_count = 0
-                    self.non_weather_timeout = 0
-                    self.periodic_info_activation = 0
-
-                # on 'h' key, set mode to 'hourly weather'
-                elif event.key == K_h:
-                    self.current_screen = 'h'
-                    self.d_count = 0
-                    self.h_count = 1
-                    self.non_weather_timeout = 0
-                    self.periodic_info_activation = 0
-
-                # On 'i' key, set mode to 'info'.
-                elif event.key == K_i:
-                    self.current_screen = 'i'
-                    self.d_count = 0
-                    self.h_count = 0
-                    self.non_weather_timeout = 0
-                    self.periodic_info_activation = 0
-
                 # On 's' key, save a screen shot.
                 elif event.key == K_s:
                     self.my_weather_rock.screen_cap()
 
-    def screen_switcher(self):
+                # Each screen has a key that switches to it: 'd' for
+                # daily, 'h' for hourly, and 'i' for info by default.
+                elif pygame.key.name(event.key) in self.plugins.keys:
+                    self.show_screen(
+                        self.plugins.keys[pygame.key.name(event.key)],
+                        time.time())
+
+    def show_screen(self, screen, now):
+        """
+        Switches to a screen right away and restarts the timers used to
+        rotate through the screens.
+        """
+        self.current_screen = screen
+        self.screen_since = now
+        self.weather_since = now
+        self.tick = None
+
+    def pause_for(self, screen):
+        """
+        Returns how many seconds a screen stays up before moving on.
+        """
+        return self.plugins.pauses[screen]
+
+    def next_switch(self):
+        """
+        Returns the wall clock time of the next automatic screen change.
+        """
+        if (self.current_screen not in self.plugins.rotation or
+                self.plugins.interlude is None):
+            return self.screen_since + self.pause_for(self.current_screen)
+
+        return min(self.weather_since + self.config["info_delay"],
+                   self.screen_since + self.pause_for(self.current_screen))
+
+    def refresh(self):
+        """
+        Returns how many seconds go by between redraws right now.
+        """
+        if self.power is None:
+            return 1
+        return self.power.refresh
+
+    def next_deadline(self, now):
+        """
+        Returns when the main loop next needs to wake up: the next redraw,
+        normally on the next second boundary so the clock stays current,
+        or the next screen change if that comes first.
+        """
+        refresh = self.refresh()
+        return min((math.floor(now / refresh) + 1) * refresh,
+                   self.next_switch())
+
+    def screen_switcher(self, now):
         """
         This function takes care of cycling through the different screens
         on a regular basis.
         """
 
-        # Automatically switch back to weather display after a couple minutes
-        if self.current_screen not in ('d', 'h'):
-            self.periodic_info_activation = 0
-            self.non_weather_timeout += 1
-            self.d_count = 0
-            self.h_count = 0
-
-            # Default in config.json.sample: pause for 5 minutes on info screen
-            if self.non_weather_timeout > (self.config["info_pause"] * 10):
-                self.current_screen = 'd'
-                self.d_count = 1
-                self.my_weather_rock.log.info("Switching to weather mode")
-        else:
-            self.non_weather_timeout = 0
-            self.periodic_info_activation += 1
+        if now >= self.next_switch():
+            # Automatically switch back to the rotation after a couple
+            # minutes. Default in config.json.sample: pause for 5 minutes
+            # on info screen
+            if self.current_screen not in self.plugins.rotation:
+                screen = self.plugins.first()
+                self.my_weather_rock.log.info(f"Switching to {screen}")
+                self.show_screen(screen, now)
 
             # Default is to flip between 2 weather screens
             # for 15 minutes before showing info screen.
-            if self.periodic_info_activation > (self.config["info_delay"] * 10):
-                self.current_screen = 'i'
-                self.my_weather_rock.log.info("Switching to info mode")
-            elif (self.periodic_info_activation % (
-                    ((self.config["plugins"]["daily"]["pause"] * self.d_count)
-                        + (self.config["plugins"]["hourly"]["pause"] * self.h_count))
-                    * 10)) == 0:
-                if self.current_screen == 'd':
-                    self.my_weather_rock.log.info("Switching to HOURLY")
-                    self.current_screen = 'h'
-                    self.h_count += 1
-                else:
-                    self.my_weather_rock.log.info("Switching to DAILY")
-                    self.current_screen = 'd'
-                    self.d_count += 1
-
-        # Daily Weather Display Mode
-        if self.current_screen == 'd':
-            # Update / Refresh the display after each second.
-            if self.seconds != time.localtime().tm_sec:
-                self.seconds = time.localtime().tm_sec
-                self.daily.disp_daily(self.my_weather_rock)
-
-            # Once the screen is updated, we have a full second to get the
-            # weather. Once per minute, check to see if its time to get a
-            # new set of data from the API.
-            if self.seconds == 0:
-                self.check_forecast()
-
-        # Hourly Weather Display Mode
-        elif self.current_screen == 'h':
-            # Update / Refresh the display after each second.
-            if self.seconds != time.localtime().tm_sec:
-                self.seconds = time.localtime().tm_sec
-                self.hourly.disp_hourly(self.my_weather_rock)
-
-            # Once the screen is updated, we have a full second to get the
-            # weather. Once per minute, check to see if its time to get a
-            # new set of data from the API.
-            if self.seconds == 0:
-                self.check_forecast()
-
-        # Info Screen Display Mode
-        elif self.current_screen == 'i':
-            # Pace the screen updates to once per second.
-            if self.seconds != time.localtime().tm_sec:
-                self.seconds = time.localtime().tm_sec
-
-                # Disaplay information about the application along with the
-                # time of sunrise and sunset.
-                self.info.disp_info(self.my_weather_rock)
+            elif (self.plugins.interlude is not None and
+                    now >= self.weather_since + self.config["info_delay"]):
+                screen = self.plugins.interlude
+                self.my_weather_rock.log.info(f"Switching to {screen}")
+                self.show_screen(screen, now)
+            else:
+                screen = self.plugins.next(self.current_screen)
+                self.my_weather_rock.log.info(f"Switching to {screen}")
+                self.current_screen = screen
+                self.screen_since = now
+                self.tick = None
+
+        # Dim, blank, or slow down the display when the power schedule
+        # says to
+        (power, changed) = self.my_weather_rock.update_power(now)
+        if changed:
+            self.tick = None
+            self.last_frame = None
+            if power.blank:
+                self.my_weather_rock.blank()
+        self.power = power
+        if power.blank:
+            return
+
+        # Update / Refresh the display after each second, or less often
+        # when the power schedule has slowed it down.
+        tick = math.floor(now / power.refresh)
+        if self.tick == tick:
+            return
+        self.tick = tick
+        self.count_dropped_frames(now)
+
+        # There's nothing for the screens to show until the first forecast
+        if self.my_weather_rock.forecast_version == 0:
+            self.my_weather_rock.disp_waiting()
+            return
+
+        with self.my_weather_rock.metrics.span(
+                f"disp_{self.current_screen}"):
+            self.plugins.render(self.current_screen)
+
+    def count_dropped_frames(self, now):
+        """
+        Counts the frames that never got drawn because the loop was
+        running behind.
+        """
+        refresh = self.refresh()
+        if self.last_frame is not None:
+            missed = int(math.floor(now / refresh) -
+                         math.floor(self.last_frame / refresh)) - 1
+            if missed > 0:
+                self.my_weather_rock.metrics.incr("dropped_frames", missed)
+        self.last_frame = now
 
     def check_forecast(self):
-        try:
-            self.my_weather_rock.get_forecast()
-        # includes simplejson.decoder.JSONDecodeError
-        except ValueError:
-            self.my_weather_rock.log.exception(
-                f"Decoding JSON has failed: {sys.exc_info()[0]}")
-        except BaseException:
-            self.my_weather_rock.log.exception(
-                f"Unexpected error: {sys.exc_info()[0]}")
+        """
+        Picks up a new forecast if the background fetcher has one ready.
+        Fetching happens on another thread so this never waits on the
+        network.
+        """
+        if self.my_weather_rock.check_for_update():
+            self.my_weather_rock.log.debug("New forecast available")
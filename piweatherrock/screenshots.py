@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import glob
+import io
+import logging
+import os
+import queue
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pygame
+
+# The image formats pygame can write, by file extension. pygame doesn't
+# have a WebP encoder so that isn't one of them.
+CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.bmp': 'image/bmp',
+    '.tga': 'image/x-tga',
+}
+
+
+def check_format(path):
+    """
+    Returns the extension of path after making sure pygame can save it.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in CONTENT_TYPES:
+        raise ValueError(f"Can't save images as '{extension}'. Use one of: "
+                         f"{', '.join(CONTENT_TYPES)}")
+    return extension
+
+
+class FrameWriter(threading.Thread):
+    """
+    Saves copies of the screen on a background thread so encoding them
+    never holds up the clock.
+
+    Screenshots get a timestamped name in directory and only the newest
+    keep of them are kept. Exported frames replace export_path in one
+    step, so anything reading it never sees half an image, and the
+    newest one is kept in memory for FrameServer to hand out.
+
+    Frames are queued as copies of the screen. If the worker falls
+    behind, new ones are dropped instead of piling up.
+    """
+
+    def __init__(self, directory=".", keep=20, extension=".jpeg",
+                 export_path=None, queue_size=4):
+        super().__init__(name="frame-writer", daemon=True)
+        self.log = logging.getLogger(__name__)
+        self.directory = directory
+        self.keep = keep
+        self.extension = check_format(f"screenshot{extension}")
+        self.export_path = export_path
+        if export_path:
+            self.export_extension = check_format(export_path)
+        else:
+            self.export_extension = '.png'
+        self.queue = queue.Queue(queue_size)
+        self.lock = threading.Lock()
+        self.latest = None
+        self.dropped = 0
+
+    def screenshot(self, surface):
+        """
+        Queues a copy of surface to be saved as a screenshot.
+        """
+        self.put(('screenshot', surface.copy(), time.time()))
+
+    def export(self, surface):
+        """
+        Queues a copy of surface to be written to export_path and served.
+        """
+        self.put(('export', surface.copy(), time.time()))
+
+    def put(self, job):
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.dropped += 1
+            self.log.warning("Frame writer is behind. Dropped a frame.")
+
+    def get_latest(self):
+        """
+        Returns (image bytes, content type) for the last exported frame,
+        or None if there hasn't been one yet.
+        """
+        with self.lock:
+            return self.latest
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+
+            (kind, surface, taken_at) = job
+            try:
+                if kind == 'screenshot':
+                    self.save_screenshot(surface, taken_at)
+                else:
+                    self.save_export(surface)
+            except (pygame.error, OSError) as e:
+                self.log.error(f"Unable to save {kind}: {e}")
+
+    def save_screenshot(self, surface, taken_at):
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(taken_at))
+        name = f"screenshot-{stamp}-{int(taken_at * 1000) % 1000:03d}"
+        path = os.path.join(self.directory, name + self.extension)
+        os.makedirs(self.directory, exist_ok=True)
+        pygame.image.save(surface, path)
+        self.log.info(f"Screen capture saved to {path}")
+
+        if self.keep:
+            pattern = os.path.join(self.directory,
+                                   f"screenshot-*{self.extension}")
+            for old in sorted(glob.glob(pattern))[:-self.keep]:
+                os.remove(old)
+
+    def save_export(self, surface):
+        data = io.BytesIO()
+        pygame.image.save(surface, data, f"frame{self.export_extension}")
+        data = data.getvalue()
+        with self.lock:
+            self.latest = (data, CONTENT_TYPES[self.export_extension])
+
+        if self.export_path:
+            tmp_file = f"{self.export_path}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(data)
+            os.replace(tmp_file, self.export_path)
+
+    def stop(self):
+        self.queue.put(None)
+        self.join()
+
+
+class FrameServer(threading.Thread):
+    """
+    Serves the last exported frame over http at /frame so a display can
+    be checked on without a VNC session.
+    """
+
+    def __init__(self, writer, host, port):
+        super().__init__(name="frame-server", daemon=True)
+        handler = type("FrameHandler", (FrameHandler,), {"writer": writer})
+        self.server = HTTPServer((host, port), handler)
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FrameHandler(BaseHTTPRequestHandler):
+    writer = None
+
+    def do_GET(self):
+        if self.path != "/frame":
+            self.send_error(404)
+            return
+
+        latest = self.writer.get_latest()
+        if latest is None:
+            self.send_error(503, "No frame has been exported yet")
+            return
+
+        (body, content_type) = latest
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Dashboards poll for frames and would flood the log
+        pass
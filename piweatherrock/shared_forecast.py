@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import mmap
+import os
+import struct
+import time
+
+from array import array
+
+from piweatherrock.forecast import Conditions, Forecast, Series
+
+# The file starts with a header followed by two slots. A new forecast is
+# always written into the slot that isn't being read, then the header is
+# switched over to it. Readers keep using the old slot until they next
+# poll, so they never see a half written forecast.
+#
+# header: magic, version, active slot, sequence number, fetched at,
+#         length of the active slot's contents
+HEADER = struct.Struct('<4sHHQdQ')
+HEADER_SIZE = 64
+MAGIC = b'PWRF'
+VERSION = 1
+SLOT_SIZE = 256 * 1024
+
+# Each slot holds:
+#   provider name string index
+#   current conditions: numbers, then summary and icon string indexes
+#   hourly series, then daily series: count, one array of doubles per
+#     numeric field, then icon and summary string indexes
+#   string table: count, then each string's length and utf-8 bytes
+CURRENT_FIELDS = ('time', 'temperature', 'apparent_temperature',
+                  'humidity', 'wind_speed', 'wind_bearing',
+                  'precip_probability')
+CURRENT = struct.Struct(f'<{len(CURRENT_FIELDS)}dII')
+COUNT = struct.Struct('<I')
+
+# The sequence number is odd while the header is being updated
+SEQ_OFFSET = 8
+
+# How many times to try reading a forecast that keeps changing under us
+READ_ATTEMPTS = 3
+
+
+def pad(length):
+    """
+    Returns how many bytes to add to length to keep doubles aligned.
+    """
+    return -length % 8
+
+
+def encode(weather, provider):
+    """
+    Turns a Forecast into the bytes stored in a slot.
+    """
+    strings = {}
+
+    def index(value):
+        return strings.setdefault(value, len(strings))
+
+    parts = [COUNT.pack(index(provider)), bytes(4)]
+    current = weather.current
+    parts.append(CURRENT.pack(
+        *(getattr(current, field) for field in CURRENT_FIELDS),
+        index(current.summary), index(current.icon)))
+
+    for series in (weather.hourly, weather.daily):
+        parts.append(COUNT.pack(len(series)))
+        parts.append(bytes(4))
+        for field in Series.numeric_fields:
+            parts.append(array('d', getattr(series, field)).tobytes())
+        refs = array('I', [index(icon) for icon in series.icon] +
+                     [index(summary) for summary in series.summary])
+        parts.append(refs.tobytes())
+        parts.append(bytes(pad(len(refs) * refs.itemsize)))
+
+    parts.append(COUNT.pack(len(strings)))
+    for value in strings:
+        encoded = value.encode('utf-8')
+        parts.append(COUNT.pack(len(encoded)))
+        parts.append(encoded)
+
+    return b''.join(parts)
+
+
+def read_array(typecode, body, offset, count):
+    """
+    Copies count values of typecode out of body starting at offset.
+    """
+    values = array(typecode)
+    values.frombytes(body[offset:offset + count * values.itemsize])
+    return values
+
+
+def decode(body):
+    """
+    Turns the contents of a slot back into (provider, Forecast). The
+    numbers are copied out of body, since the writer reuses the slot two
+    forecasts later while the display may still be showing this one.
+    """
+    # The string table is at the end so read everything else first
+    offset = 8
+    numbers = CURRENT.unpack_from(body, offset)
+    offset += CURRENT.size
+
+    series_layout = []
+    for _ in range(2):
+        (count,) = COUNT.unpack_from(body, offset)
+        offset += 8
+        columns = {}
+        for field in Series.numeric_fields:
+            columns[field] = read_array('d', body, offset, count)
+            offset += count * 8
+        # Icon then summary indexes, padded out to a multiple of 8 bytes
+        refs = read_array('I', body, offset, count * 2)
+        offset += count * 8
+        series_layout.append((columns, refs, count))
+
+    (string_count,) = COUNT.unpack_from(body, offset)
+    offset += COUNT.size
+    strings = []
+    for _ in range(string_count):
+        (length,) = COUNT.unpack_from(body, offset)
+        offset += COUNT.size
+        strings.append(bytes(body[offset:offset + length]).decode('utf-8'))
+        offset += length
+
+    (provider,) = COUNT.unpack_from(body, 0)
+    values = dict(zip(CURRENT_FIELDS, numbers))
+    current = Conditions(
+        summary=strings[numbers[-2]], icon=strings[numbers[-1]], **values)
+
+    hourly, daily = (
+        Series.from_columns(
+            [strings[i] for i in refs[:count]],
+            [strings[i] for i in refs[count:]],
+            **columns)
+        for columns, refs, count in series_layout)
+
+    return strings[provider], Forecast(current, hourly, daily)
+
+
+class SharedForecastWriter:
+    """
+    Publishes forecasts to a memory mapped file, ideally somewhere in
+    /dev/shm, for SharedForecastReader to pick up in other processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        length = HEADER_SIZE + SLOT_SIZE * 2
+        self.file = os.fdopen(
+            os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+        if os.path.getsize(path) < length:
+            self.file.truncate(length)
+        self.map = mmap.mmap(self.file.fileno(), length)
+
+        (magic, version, slot, seq) = HEADER.unpack_from(self.map, 0)[:4]
+        if magic != MAGIC or version != VERSION:
+            (slot, seq) = (1, 0)
+        self.slot = slot
+        self.seq = seq + (seq % 2)
+
+    def write(self, weather, fetched_at, provider):
+        body = encode(weather, provider)
+        if len(body) > SLOT_SIZE:
+            raise ValueError(f"Forecast is too large to share: "
+                             f"{len(body)} bytes")
+
+        slot = 1 - self.slot
+        start = HEADER_SIZE + slot * SLOT_SIZE
+        self.map[start:start + len(body)] = body
+
+        struct.pack_into('<Q', self.map, SEQ_OFFSET, self.seq + 1)
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, slot, self.seq + 1,
+                         fetched_at, len(body))
+        self.seq += 2
+        struct.pack_into('<Q', self.map, SEQ_OFFSET, self.seq)
+        self.slot = slot
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class SharedForecastReader:
+    """
+    Picks up forecasts published by SharedForecastWriter. Nothing is
+    parsed; the hourly and daily numbers are copied straight out of the
+    shared memory a column at a time.
+
+    The sequence number is checked before and after a forecast is read,
+    so one that was overwritten partway through is read again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.map = None
+        self.seq = 0
+
+    def open(self):
+        """
+        Maps the file once the writer has created it. Returns False if it
+        isn't there yet.
+        """
+        if self.map is not None:
+            return True
+        try:
+            if os.path.getsize(self.path) < HEADER_SIZE + SLOT_SIZE * 2:
+                return False
+        except OSError:
+            return False
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def current_seq(self):
+        return struct.unpack_from('<Q', self.map, SEQ_OFFSET)[0]
+
+    def poll(self):
+        """
+        Returns (provider, Forecast, fetched at) if a new forecast has
+        been published since the last call, otherwise None.
+        """
+        if not self.open():
+            return None
+
+        for _ in range(READ_ATTEMPTS):
+            seq = self.current_seq()
+            # Stop early if nothing has changed
+            if seq == self.seq:
+                return None
+
+            (magic, version, slot, header_seq, fetched_at, size) = \
+                HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != VERSION:
+                return None
+            if seq % 2 or header_seq != seq:
+                # Being written right now
+                continue
+
+            start = HEADER_SIZE + slot * SLOT_SIZE
+            try:
+                provider, weather = decode(
+                    memoryview(self.map)[start:start + size])
+            except (IndexError, ValueError, struct.error):
+                if self.current_seq() == seq:
+                    raise
+                continue
+
+            if self.current_seq() == seq:
+                self.seq = seq
+                return provider, weather, fetched_at
+            # Overwritten while being read. Try again.
+
+        return None
+
+    def wait(self, timeout):
+        """
+        Waits up to timeout seconds for a forecast newer than the last one
+        read to be published. Returns True if there is one. Nothing
+        signals across processes when the writer publishes, so this
+        watches the sequence number, checking less often the longer it
+        waits.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            if self.open() and self.current_seq() not in (self.seq,
+                                                           self.seq + 1):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+from collections import OrderedDict
+
+
+class TextCache:
+    """
+    Holds on to rendered text so that labels such as 'Feels Like:' or a
+    day name are only rendered once instead of every time a screen is
+    drawn.
+
+    Surfaces are keyed by the text, the font used, and the color. Once
+    there are more than limit of them the least recently used one is
+    dropped, which keeps things like the clock from growing the cache
+    forever. Like the FontCache, this is emptied whenever the screen is
+    resized since the fonts it was rendered with go away.
+    """
+
+    def __init__(self, limit=256):
+        self.limit = limit
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        """
+        Returns text rendered with font in color, rendering it first if
+        it isn't already cached.
+        """
+        key = (text, font, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = font.render(text, True, color).convert_alpha()
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.limit:
+                self.surfaces.popitem(last=False)
+        else:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+
+        return surface
+
+    def clear(self):
+        """
+        Drops every cached surface and resets the counters.
+        """
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
@@ -14,15 +14,44 @@ import json
 import logging
 import logging.handlers
 
+from collections import namedtuple
+
 # third party imports
-from darksky import forecast
 import pygame
-import requests
 
+# local imports
+from piweatherrock.fetcher import ForecastFetcher
+from piweatherrock.fonts import FontCache
+from piweatherrock.forecast_cache import ForecastCache
+from piweatherrock.forecast_view import ForecastView
+from piweatherrock.framebuffer import Framebuffer
+from piweatherrock.icons import IconAtlas
+from piweatherrock.layout import Layout
+from piweatherrock.logs import parse_level, start_logging, stop_logging
+from piweatherrock.metrics import Metrics, MetricsServer, StartupTimer
+from piweatherrock.plugins import RenderContext
+from piweatherrock.power import (
+    PowerLevel, PowerManager, PowerSchedule, PwmBacklight, SysfsBacklight)
+from piweatherrock.providers import get_provider
+from piweatherrock.renderer import BurnInSchedule, LayeredRenderer
+from piweatherrock.screenshots import FrameServer, FrameWriter, check_format
+from piweatherrock.shared_forecast import (
+    SharedForecastReader, SharedForecastWriter)
+from piweatherrock.text import TextCache
 
 # globals
 UNICODE_DEGREE = u'\xb0'
 
+# How long to wait at startup for another rock to share a forecast, in
+# seconds
+SHARED_FORECAST_WAIT = 30
+
+# Everything that comes from a single fetch. A new one is built for every
+# fetch so that the background fetcher never changes data being drawn.
+ForecastSnapshot = namedtuple('ForecastSnapshot', [
+    'weather', 'sunrise', 'sunset', 'sunrise_string', 'sunset_string',
+    'fetched_at', 'from_cache', 'view'])
+
 def exit_gracefully(signum, frame):
     sys.exit(0)
 
@@ -32,20 +61,101 @@ signal.signal(signal.SIGTERM, exit_gracefully)
 
 class Weather:
     """
-    Fetches weather reports from Dark Sky for displaying on a screen.
+    Fetches weather reports from the configured provider (Dark Sky by
+    default) for displaying on a screen.
     """
 
-    def __init__(self, config_file):
+    def __init__(self, config_file, startup=None, fetch=True):
+        """
+        Sets up the display and loads the cached forecast. If there isn't
+        one, the forecast is fetched right away unless fetch is False, in
+        which case the screens have nothing to show until the background
+        fetcher gets one. Each step of starting up is timed with startup.
+        """
+        self.startup = startup or StartupTimer()
         with open(config_file, "r") as f:
             self.config = json.load(f)
+        self.startup.mark("config")
 
-        self.last_update_check = 0
-        self.weather = {}
-        self.get_forecast()
         # Initialize logger
         self.log = self.get_logger()
+        self.startup.mark("logging")
+
+        self.last_update_check = 0
+        self.forecast_version = 0
+        self.weather = {}
+        self.view = None
+        self.screen = None
+        self.layout = None
+        self.icon_size = None
+        self.context = None
+        self.snapshot = None
+        self.fetcher = None
+        # Looking up font files is slow so the results are kept on disk
+        self.fonts = FontCache(os.path.join(
+            os.path.dirname(os.path.abspath(config_file)),
+            ".font_cache.json"))
+        self.text = TextCache()
+        self.icons = IconAtlas()
+        self.metrics = Metrics()
+        self.metrics_server = None
+        self.metrics_exported = 0
+        self.frame_writer = None
+        self.frame_server = None
+        self.frame_exported = 0
+        self.renderer = LayeredRenderer(self.metrics, self.update_display,
+                                        self.get_burn_in_schedule())
+        self.power = self.get_power_manager()
+        self.provider = get_provider(self.config)
+        self.add_gauges()
+
+        # The last good forecast is kept next to the config file. Starting
+        # from it means we can draw right away and let the fetcher catch up.
+        self.cache = ForecastCache(os.path.join(
+            os.path.dirname(os.path.abspath(config_file)),
+            ".forecast_cache.json.gz"))
+
+        # Rocks on the same machine can share one fetcher's forecasts
+        # through a memory mapped file instead of each fetching their own.
+        self.shared_writer = None
+        self.shared_reader = None
+        shared_path = self.config.get("shared_forecast", "")
+        if shared_path and \
+                self.config.get("shared_forecast_mode", "write") == "read":
+            self.shared_reader = SharedForecastReader(shared_path)
+            if fetch:
+                self.wait_for_shared_forecast(SHARED_FORECAST_WAIT)
+        else:
+            if shared_path:
+                self.shared_writer = SharedForecastWriter(shared_path)
+            if not self.load_cached_forecast() and fetch:
+                self.get_forecast()
+        self.startup.mark("forecast")
 
-        if platform.system() == 'Darwin':
+        self.framebuffer = None
+        self.headless = self.config.get("headless", False)
+        if self.config.get("output", "sdl") == "framebuffer":
+            # Draw into memory with SDL and copy what changed straight
+            # into the framebuffer.
+            self.framebuffer = Framebuffer(
+                self.config.get("framebuffer_device", "/dev/fb0"),
+                self.config.get("framebuffer_size"),
+                self.config.get("framebuffer_bpp"))
+            self.log.info(f"Writing to {self.framebuffer.device}: "
+                          f"{self.framebuffer.size[0]} x "
+                          f"{self.framebuffer.size[1]}, "
+                          f"{self.framebuffer.bpp} bpp")
+            self.headless = True
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            pygame.display.init()
+            size = self.framebuffer.size
+        elif self.headless:
+            # SDL's dummy driver draws into memory instead of onto a
+            # screen, which is what benchmarks and screenshots need.
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            pygame.display.init()
+            size = tuple(self.config.get("headless_size", (800, 480)))
+        elif platform.system() == 'Darwin':
             pygame.display.init()
             driver = pygame.display.get_driver()
             self.log.debug(f"Using the {driver} driver.")
@@ -75,8 +185,9 @@ class Weather:
             if not found:
                 self.log.exception("No suitable video driver found!")
 
-        size = (pygame.display.Info().current_w,
-                pygame.display.Info().current_h)
+        if not self.headless:
+            size = (pygame.display.Info().current_w,
+                    pygame.display.Info().current_h)
         self.sizing(size)
 
         # Clear the screen to start
@@ -85,13 +196,13 @@ class Weather:
         pygame.font.init()
         # Render the screen
         pygame.mouse.set_visible(0)
-        pygame.display.update()
+        self.update_display()
+        self.startup.mark("display")
 
-        self.subwindow_text_height = 0.055
-        self.time_date_text_height = 0.115
-        self.time_date_small_text_height = 0.075
-        self.time_date_y_position = 8
-        self.time_date_small_y_position = 18
+        # Every screen is drawn in bold freesans. Finding it is the slow
+        # part of loading a font, so get it out of the way now.
+        self.fonts.find("freesans", True)
+        self.startup.mark("fonts")
 
     def __del__(self):
         "Destructor to make sure pygame shuts down, etc."
@@ -104,7 +215,23 @@ class Weather:
 
         self.log.debug(f"Framebuffer Size: {size[0]} x {size[1]}")
 
-        if self.config["fullscreen"]:
+        # Every font size is relative to the screen size so the cached
+        # fonts are only good until the size changes.
+        self.log.debug(f"Font cache: {self.fonts.hits} hits, "
+                       f"{self.fonts.misses} misses")
+        self.log.debug(f"Text cache: {self.text.hits} hits, "
+                       f"{self.text.misses} misses")
+        self.fonts.clear()
+        self.text.clear()
+        self.renderer.invalidate()
+
+        if self.headless:
+            # The dummy driver always uses its own size for fullscreen, so
+            # use a plain window laid out like a full screen instead.
+            self.screen = pygame.display.set_mode(size)
+            self.xmax = size[0]
+            self.ymax = size[1]
+        elif self.config["fullscreen"]:
             self.screen = pygame.display.set_mode(size, pygame.FULLSCREEN)
             self.xmax = pygame.display.Info().current_w #  - 35 Why not use full screen in "fullescreen"?
             self.ymax = pygame.display.Info().current_h #  - 5 Why not use full screen in "fullescreen"?
@@ -119,79 +246,503 @@ class Weather:
         else:
             self.icon_size = '256'
 
+        # Everything drawn is positioned relative to the screen size, so
+        # work it all out once here instead of on every frame.
+        self.layout = Layout(self.xmax, self.ymax)
+        self.context = RenderContext(self)
+
+    def get_burn_in_schedule(self):
+        """
+        Returns the BurnInSchedule described by the 'burn_in_*' settings,
+        or None if moving and dimming the screen is turned off.
+        """
+        shift = self.config.get("burn_in_shift", 0)
+        border_dim = self.config.get("burn_in_border_dim", 1.0)
+        if shift <= 0 and border_dim >= 1:
+            return None
+
+        return BurnInSchedule(
+            shift, self.config.get("burn_in_interval", 60), border_dim,
+            self.config.get("burn_in_border_interval", 1800))
+
+    def get_power_manager(self):
+        """
+        Returns the PowerManager for the 'day_*', 'night_*', 'quiet_*' and
+        'backlight*' settings. Without them the screen stays at full
+        brightness and redraws every second.
+        """
+        day = PowerLevel(
+            "day", self.config.get("day_brightness", 100), 1, False)
+        night = PowerLevel(
+            "night", self.config.get("night_brightness", 100),
+            self.config.get("night_refresh", 1), False)
+        quiet = PowerLevel(
+            "quiet", self.config.get("quiet_brightness", 100),
+            self.config.get("quiet_refresh", 60),
+            self.config.get("quiet_blank", False))
+        schedule = PowerSchedule(
+            day, night, quiet, self.config.get("quiet_start", ""),
+            self.config.get("quiet_end", ""))
+
+        backlight = None
+        kind = self.config.get("backlight", "")
+        try:
+            if kind == "sysfs":
+                backlight = SysfsBacklight(self.config.get(
+                    "backlight_path", "/sys/class/backlight/rpi_backlight"))
+            elif kind == "pwm":
+                backlight = PwmBacklight(
+                    self.config.get("backlight_pin", 18),
+                    self.config.get("backlight_frequency", 1000))
+            elif kind:
+                self.log.error(f"Unknown backlight: {kind}")
+        except (OSError, ValueError) as e:
+            self.log.error(f"Unable to control the backlight: {e}")
+
+        return PowerManager(schedule, backlight, self.metrics,
+                            self.config.get("wake_seconds", 120))
+
+    def update_power(self, now):
+        """
+        Brings the backlight and refresh rate up to date for now. Returns
+        (PowerLevel, changed) like PowerManager.update().
+        """
+        daily = self.weather.daily if self.forecast_version else None
+        return self.power.update(now, daily)
+
+    def blank(self):
+        """
+        Clears the screen for as long as it is blanked.
+        """
+        self.screen.fill((0, 0, 0))
+        self.renderer.invalidate()
+        self.update_display()
+
+    def update_display(self, rects=None):
+        """
+        Shows what has been drawn on the screen. Only the parts covered by
+        rects are updated if any are given.
+        """
+        if self.framebuffer is not None:
+            self.framebuffer.write(self.screen, rects)
+        else:
+            pygame.display.update(rects)
+
     def get_logger(self):
         """
         Create a logger to be used for logging messages to a file. The
         verbosity of the logs is determined by the 'log_level' setting in
-        the config file.
+        the config file. Messages are written to the file on a background
+        thread so a slow SD card never holds up the display.
         """
-        lvl_str = f"logging.{self.config['log_level']}"
         log = logging.getLogger()
-        log.setLevel(eval(lvl_str))
+        try:
+            level = parse_level(self.config['log_level'])
+            bad_level = None
+        except ValueError as e:
+            level = logging.INFO
+            bad_level = e
+        log.setLevel(level)
         formatter = logging.Formatter(
             "%(asctime)s %(levelname)-8s %(message)s",
             datefmt='%Y-%m-%d %H:%M:%S')
         handler = logging.handlers.RotatingFileHandler(
                 ".log", maxBytes=500000, backupCount=3)
+        stop_logging(log)
         if (log.hasHandlers()):
             log.handlers.clear()
         handler.setFormatter(formatter)
-        log.addHandler(handler)
+        self.log_handler = start_logging(log, handler)
+
+        if bad_level is not None:
+            log.warning(f"{bad_level}. Logging at INFO instead.")
 
         return log
 
     def get_forecast(self):
         """
         Gets updated information if the 'update_freq' amount of time has
-        passed since last querying the api.
+        passed since last querying the api. This blocks until the request
+        is done so it is only used at startup. After that, the background
+        fetcher started by start_fetcher() takes over.
         """
         if (time.time() - self.last_update_check) > self.config["update_freq"]:
             self.last_update_check = time.time()
-            try:
-                self.weather = forecast(
-                    self.config["ds_api_key"],
-                    self.config["lat"],
-                    self.config["lon"],
-                    exclude='minutely',
-                    units=self.config["units"],
-                    lang=self.config["lang"])
-
-                sunset_today = datetime.datetime.fromtimestamp(
-                    self.weather.daily[0].sunsetTime)
-                if datetime.datetime.now() < sunset_today:
-                    index = 0
-                    sr_suffix = 'today'
-                    ss_suffix = 'tonight'
-                else:
-                    index = 1
-                    sr_suffix = 'tomorrow'
-                    ss_suffix = 'tomorrow'
-
-                self.sunrise = self.weather.daily[index].sunriseTime
-                self.sunset = self.weather.daily[index].sunsetTime
-
-                if self.config["12hour_disp"]:
-                    self.sunrise_string = datetime.datetime.fromtimestamp(
-                        self.sunrise).strftime("%I:%M %p {}").format(sr_suffix)
-                    self.sunset_string = datetime.datetime.fromtimestamp(
-                        self.sunset).strftime("%I:%M %p {}").format(ss_suffix)
-                else:
-                    self.sunrise_string = datetime.datetime.fromtimestamp(
-                        self.sunrise).strftime("%H:%M {}").format(sr_suffix)
-                    self.sunset_string = datetime.datetime.fromtimestamp(
-                        self.sunset).strftime("%H:%M {}").format(ss_suffix)
-
-            except requests.exceptions.RequestException as e:
-                self.log.exception(f"Request exception: {e}")
-                return False
-            except AttributeError as e:
-                self.log.exception(f"Attribute error: {e}")
+            snapshot = self.fetch_forecast()
+            if snapshot is None:
                 return False
+            self.apply_snapshot(snapshot)
+        return True
+
+    def fetch_forecast(self):
+        """
+        Queries the api and works out the next sunrise and sunset from the
+        result. Returns a ForecastSnapshot, or None if the request failed.
+        This doesn't touch any of the data being displayed so it is safe to
+        call from the background fetcher.
+        """
+        # Imported here so that starting up doesn't wait on it. This
+        # normally runs on the fetcher thread.
+        import requests
+
+        fetched_at = time.time()
+        try:
+            with self.metrics.span("fetch_forecast"):
+                payload = self.provider.fetch()
+                # The fetch service says when it really fetched the
+                # forecast, which is what staleness goes by
+                if self.provider.fetched_at is not None:
+                    fetched_at = self.provider.fetched_at
+                snapshot = self.build_snapshot(
+                    self.provider.parse(payload), fetched_at)
+
+        except requests.exceptions.RequestException as e:
+            self.log.exception(f"Request exception: {e}")
+            self.metrics.incr("fetch_failures")
+            return None
+        except OSError as e:
+            self.log.exception(f"Unable to read forecast: {e}")
+            self.metrics.incr("fetch_failures")
+            return None
+        except (IndexError, KeyError, TypeError) as e:
+            self.log.exception(f"Unexpected forecast data: {e}")
+            self.metrics.incr("fetch_failures")
+            return None
+        # includes simplejson.decoder.JSONDecodeError
+        except ValueError as e:
+            self.log.exception(f"Decoding JSON has failed: {e}")
+            self.metrics.incr("fetch_failures")
+            return None
+
+        self.metrics.incr("fetches")
+
+        self.cache.save(payload, fetched_at, self.provider.name,
+                        etag=self.provider.etag,
+                        last_modified=self.provider.last_modified)
+        self.share_forecast(snapshot)
+
+        return snapshot
+
+    def load_cached_forecast(self):
+        """
+        Displays the forecast saved by the last successful fetch, if there
+        is one. Returns True when a cached forecast was loaded.
+        """
+        entry = self.cache.load(self.provider.name)
+        if entry is None:
+            self.metrics.incr("forecast_cache_misses")
+            return False
+
+        try:
+            snapshot = self.build_snapshot(
+                self.provider.parse(entry["data"]), entry["fetched_at"],
+                from_cache=True)
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            self.log.warning(f"Ignoring unusable forecast cache: {e}")
+            self.metrics.incr("forecast_cache_misses")
+            return False
+
+        self.metrics.incr("forecast_cache_hits")
+
+        self.log.info("Loaded forecast from cache fetched at "
+                      f"{time.ctime(snapshot.fetched_at)}")
+        self.apply_snapshot(snapshot)
+        self.share_forecast(snapshot)
+        self.provider.remember(entry["data"], entry.get("etag"),
+                               entry.get("last_modified"))
         return True
 
+    def share_forecast(self, snapshot):
+        """
+        Publishes the forecast in snapshot for other rocks to read if this
+        one is sharing its forecasts.
+        """
+        if self.shared_writer is None:
+            return
+
+        try:
+            self.shared_writer.write(snapshot.weather, snapshot.fetched_at,
+                                     self.provider.name)
+        except (OSError, ValueError) as e:
+            self.log.error(f"Unable to share forecast: {e}")
+
+    def read_shared_forecast(self):
+        """
+        Switches to the newest forecast shared by another rock if there is
+        a new one. Returns True when the forecast changed.
+        """
+        try:
+            shared = self.shared_reader.poll()
+        except (IndexError, OSError, ValueError) as e:
+            self.log.error(f"Unable to read shared forecast: {e}")
+            return False
+        if shared is None:
+            return False
+
+        (_, weather, fetched_at) = shared
+        self.apply_snapshot(self.build_snapshot(weather, fetched_at))
+        return True
+
+    def wait_for_shared_forecast(self, timeout):
+        """
+        Waits up to timeout seconds for another rock to share a forecast
+        and switches to it. Used at startup when this rock doesn't fetch
+        its own.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.read_shared_forecast():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.shared_reader.wait(remaining):
+                self.log.error("No forecast has been shared at "
+                               f"{self.shared_reader.path}")
+                return
+
+    def disp_waiting(self):
+        """
+        Shows a placeholder until there is a forecast to display.
+        """
+        self.renderer.render(self.screen, ('waiting',), self.draw_waiting)
+
+    def draw_waiting(self, surface):
+        font = self.fonts.get(
+            "freesans", self.layout.fonts['summary'], bold=1)
+        txt = self.text.render(
+            font, "Waiting for the forecast...", (255, 255, 255))
+        surface.blit(txt, ((self.xmax - txt.get_width()) / 2,
+                           (self.ymax - txt.get_height()) / 2))
+
+    def build_snapshot(self, weather, fetched_at, from_cache=False):
+        """
+        Works out the next sunrise and sunset and everything the screens
+        show from a forecast and bundles them up with it.
+        """
+        sunset_today = datetime.datetime.fromtimestamp(
+            weather.daily[0].sunset_time)
+        if datetime.datetime.now() < sunset_today:
+            index = 0
+            sr_suffix = 'today'
+            ss_suffix = 'tonight'
+        else:
+            index = 1
+            sr_suffix = 'tomorrow'
+            ss_suffix = 'tomorrow'
+
+        sunrise = weather.daily[index].sunrise_time
+        sunset = weather.daily[index].sunset_time
+
+        if self.config["12hour_disp"]:
+            sunrise_string = datetime.datetime.fromtimestamp(
+                sunrise).strftime("%I:%M %p {}").format(sr_suffix)
+            sunset_string = datetime.datetime.fromtimestamp(
+                sunset).strftime("%I:%M %p {}").format(ss_suffix)
+        else:
+            sunrise_string = datetime.datetime.fromtimestamp(
+                sunrise).strftime("%H:%M {}").format(sr_suffix)
+            sunset_string = datetime.datetime.fromtimestamp(
+                sunset).strftime("%H:%M {}").format(ss_suffix)
+
+        return ForecastSnapshot(weather, sunrise, sunset, sunrise_string,
+                                sunset_string, fetched_at, from_cache,
+                                ForecastView(weather, self.config))
+
+    def apply_snapshot(self, snapshot):
+        """
+        Makes the forecast in snapshot the one that gets displayed.
+        """
+        self.snapshot = snapshot
+        self.weather = snapshot.weather
+        self.view = snapshot.view
+        self.sunrise = snapshot.sunrise
+        self.sunset = snapshot.sunset
+        self.sunrise_string = snapshot.sunrise_string
+        self.sunset_string = snapshot.sunset_string
+        self.last_update_check = snapshot.fetched_at
+        self.forecast_version += 1
+        if self.layout is not None:
+            self.context = RenderContext(self)
+
+    def is_stale(self):
+        """
+        Returns True when what is on screen came from the cache or from
+        another rock and is older than 'update_freq'. This rock isn't the
+        one fetching those, so it can't assume they are being kept up to
+        date.
+        """
+        if self.snapshot is None:
+            return False
+        if not self.snapshot.from_cache and self.shared_reader is None:
+            return False
+        age = time.time() - self.snapshot.fetched_at
+        return age > self.config["update_freq"]
+
+    def start_fetcher(self):
+        """
+        Starts refreshing the forecast in the background every
+        'update_freq' seconds. If the current forecast is already due for
+        a refresh, such as a stale one from the cache, the first fetch
+        happens right away.
+        """
+        if self.shared_reader is not None:
+            # Another rock does the fetching
+            return
+
+        age = time.time() - self.last_update_check
+        first_delay = max(0, self.config["update_freq"] - age)
+        self.fetcher = ForecastFetcher(
+            self.fetch_forecast, self.config["update_freq"],
+            first_delay=first_delay)
+        self.fetcher.start()
+
+    def stop_fetcher(self):
+        if self.fetcher is not None:
+            self.fetcher.stop()
+        self.provider.close()
+        if self.shared_writer is not None:
+            self.shared_writer.close()
+
+    def check_for_update(self):
+        """
+        Switches to the newest forecast from the background fetcher if
+        there is one. Returns True when the forecast changed.
+        """
+        if self.shared_reader is not None:
+            return self.read_shared_forecast()
+        if self.fetcher is None:
+            return False
+
+        snapshot = self.fetcher.take()
+        if snapshot is None:
+            return False
+
+        self.apply_snapshot(snapshot)
+        return True
+
+    def add_gauges(self):
+        """
+        Registers the values that are read fresh every time the metrics
+        are exported.
+        """
+        self.metrics.gauge("forecast_version", lambda: self.forecast_version)
+        self.metrics.gauge(
+            "forecast_age_seconds",
+            lambda: round(time.time() - self.last_update_check, 1))
+        self.metrics.gauge("forecast_stale", lambda: int(self.is_stale()))
+        self.metrics.gauge("font_cache_hits", lambda: self.fonts.hits)
+        self.metrics.gauge("font_cache_misses", lambda: self.fonts.misses)
+        self.metrics.gauge("text_cache_hits", lambda: self.text.hits)
+        self.metrics.gauge("text_cache_misses", lambda: self.text.misses)
+        self.metrics.gauge("log_records_dropped",
+                           lambda: self.log_handler.dropped)
+        self.metrics.gauge("full_updates", lambda: self.renderer.full_updates)
+        self.metrics.gauge("partial_updates",
+                           lambda: self.renderer.partial_updates)
+        self.metrics.gauge("process_cpu_seconds",
+                           lambda: round(time.process_time(), 3))
+
+    def start_metrics(self):
+        """
+        Starts serving the metrics over http if 'metrics_port' is set.
+        """
+        port = self.config.get("metrics_port", 0)
+        if not port:
+            return
+
+        host = self.config.get("metrics_host", "127.0.0.1")
+        try:
+            self.metrics_server = MetricsServer(self.metrics, host, port)
+        except OSError as e:
+            self.log.error(f"Unable to serve metrics on {host}:{port}: {e}")
+            return
+        self.metrics_server.start()
+        self.log.info(f"Serving metrics at http://{host}:{port}/metrics")
+
+    def stop_metrics(self):
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def export_metrics(self, now):
+        """
+        Writes the metrics to 'metrics_file', if it is set, at most every
+        'metrics_interval' seconds. This is meant for node_exporter's
+        textfile collector.
+        """
+        path = self.config.get("metrics_file", "")
+        if not path:
+            return
+        if now - self.metrics_exported < self.config.get(
+                "metrics_interval", 15):
+            return
+
+        self.metrics_exported = now
+        try:
+            self.metrics.write_textfile(os.path.expanduser(path))
+        except OSError as e:
+            self.log.error(f"Unable to write metrics to {path}: {e}")
+
+    def start_frame_writer(self):
+        """
+        Starts the thread that saves screenshots and exported frames, and
+        serves exported frames over http if 'export_port' is set.
+        """
+        if self.frame_writer is not None:
+            return
+
+        export_path = os.path.expanduser(self.config.get("export_path", ""))
+        if export_path:
+            try:
+                check_format(export_path)
+            except ValueError as e:
+                self.log.error(f"Not exporting frames: {e}")
+                export_path = None
+
+        self.frame_writer = FrameWriter(
+            os.path.expanduser(self.config.get("screenshot_dir", ".")),
+            self.config.get("screenshot_keep", 20),
+            export_path=export_path or None)
+        self.frame_writer.start()
+
+        port = self.config.get("export_port", 0)
+        if not port:
+            return
+
+        host = self.config.get("export_host", "127.0.0.1")
+        try:
+            self.frame_server = FrameServer(self.frame_writer, host, port)
+        except OSError as e:
+            self.log.error(f"Unable to serve frames on {host}:{port}: {e}")
+            return
+        self.frame_server.start()
+        self.log.info(f"Serving frames at http://{host}:{port}/frame")
+
+    def stop_frame_writer(self):
+        if self.frame_server is not None:
+            self.frame_server.stop()
+            self.frame_server = None
+        if self.frame_writer is not None:
+            self.frame_writer.stop()
+            self.frame_writer = None
+
+    def export_frame(self, now):
+        """
+        Hands a copy of the screen to the frame writer every
+        'export_interval' seconds when 'export_path' or 'export_port' is
+        set.
+        """
+        if self.frame_writer is None:
+            return
+        if not (self.frame_writer.export_path or self.frame_server):
+            return
+        if now - self.frame_exported < self.config.get("export_interval", 60):
+            return
+
+        self.frame_exported = now
+        self.frame_writer.export(self.screen)
+
     def screen_cap(self):
         """
-        Save a jpg image of the screen
+        Save a jpg image of the screen. Only copying the screen happens
+        here. It is encoded and written out on the frame writer's thread.
         """
-        pygame.image.save(self.screen, "screenshot.jpeg")
-        self.log.info("Screen capture complete.")
+        self.start_frame_writer()
+        self.frame_writer.screenshot(self.screen)
@@ -31,6 +31,8 @@ if __name__ == "__main__":
         scripts=[
             'scripts/pwr-ui',
             'scripts/pwr-config-upgrade',
+            'scripts/pwr-bench',
+            'scripts/pwr-fetch-service',
         ],
         description="Provides forecast data from ClimaCell for PiWeatherRock",
         long_description=long_description,
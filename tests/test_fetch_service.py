@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import pytest
+
+pytest.importorskip("requests")
+
+from piweatherrock import fetch_service  # noqa: E402
+from piweatherrock.fetch_service import FetchService  # noqa: E402
+
+
+class FakeProvider:
+    """
+    Stands in for a forecast provider. One for a location named 'bad'
+    fails every time.
+    """
+
+    etag = None
+    last_modified = None
+
+    def __init__(self, config):
+        self.name = config["name"]
+
+    def fetch(self):
+        if self.name == "bad":
+            raise OSError("Connection refused")
+        return {"name": self.name}
+
+    def parse(self, payload):
+        return payload
+
+    def close(self):
+        pass
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock(1589365295.0)
+    monkeypatch.setattr(fetch_service.time, "time", fake_clock.time)
+    return fake_clock
+
+
+def start_service(names):
+    config = {
+        "update_freq": 300,
+        "fetch_calls_per_day": 1000,
+        "locations": [{"lat": index, "lon": 0} for index in
+                      range(len(names))],
+    }
+    return FetchService(
+        config, lambda location: FakeProvider(
+            dict(location, name=names[int(location["lat"])])))
+
+
+def run_for(service, clock, seconds):
+    """
+    Does what FetchService.run() does for seconds of made up time and
+    returns how many calls were made for each location.
+    """
+    calls = {}
+    end = clock.now + seconds
+    while True:
+        location = service.next_location(clock.now)
+        due = max(location.next_due, service.bucket.ready_at(clock.now))
+        if due > end:
+            return calls
+        clock.now = max(clock.now, due)
+        service.fetch(location)
+        calls[location.provider.name] = \
+            calls.get(location.provider.name, 0) + 1
+
+
+def test_failing_location_does_not_starve_the_others(clock):
+    service = start_service(["bad", "good"])
+    calls = run_for(service, clock, 7200)
+
+    # Every five minutes or so for two hours
+    assert calls["good"] >= 20
+    # Backing off from one minute to an hour
+    assert calls["bad"] <= 8
+    (bad,) = [location for location in service.locations.values()
+              if location.provider.name == "bad"]
+    assert bad.failures == calls["bad"]
+
+
+def test_new_location_goes_first_once(clock):
+    service = start_service(["good", "other"])
+    run_for(service, clock, 600)
+
+    newcomer = service.add({"lat": 1.5, "lon": 0})
+    assert service.next_location(clock.now) is newcomer
+    service.fetch(newcomer)
+    # Then it waits its turn like the rest
+    assert newcomer.next_due >= clock.now + service.interval * 0.9
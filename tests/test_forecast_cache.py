@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+from piweatherrock import forecast_cache
+from piweatherrock.forecast_cache import ForecastCache
+
+EXAMPLE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example")
+SAMPLE_CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "piweatherrock", "config.json-sample")
+
+
+@pytest.fixture
+def darksky_response():
+    """
+    A recorded Dark Sky response.
+    """
+    with open(os.path.join(EXAMPLE_DIR, "darksky_forecast.json"), "r") as f:
+        return json.load(f)
+
+
+def test_round_trip_is_gzipped_json(tmp_path, darksky_response):
+    cache_file = tmp_path / "cache.json.gz"
+    cache = ForecastCache(str(cache_file))
+    cache.save(darksky_response, 1589365295.5, "darksky",
+               etag='"abc"', last_modified="Wed, 13 May 2020 10:21:35 GMT")
+
+    with gzip.open(cache_file, "rt", encoding="utf-8") as f:
+        assert json.load(f)["data"] == darksky_response
+
+    entry = cache.load("darksky")
+    assert entry == {
+        "data": darksky_response,
+        "fetched_at": 1589365295.5,
+        "provider": "darksky",
+        "etag": '"abc"',
+        "last_modified": "Wed, 13 May 2020 10:21:35 GMT",
+    }
+
+
+def test_other_providers_cache_is_ignored(tmp_path, darksky_response):
+    cache = ForecastCache(str(tmp_path / "cache.json.gz"))
+    cache.save(darksky_response, time.time(), "darksky")
+
+    assert cache.load("wunderground") is None
+    assert cache.load("darksky") is not None
+
+
+def test_missing_or_corrupt_cache_is_ignored(tmp_path):
+    cache_file = tmp_path / "cache.json.gz"
+    cache = ForecastCache(str(cache_file))
+    assert cache.load("darksky") is None
+
+    cache_file.write_bytes(b"not gzip")
+    assert cache.load("darksky") is None
+
+
+def test_save_replaces_the_file_in_one_step(tmp_path, monkeypatch,
+                                            darksky_response):
+    cache_file = str(tmp_path / "cache.json.gz")
+    cache = ForecastCache(cache_file)
+    cache.save(darksky_response, 1, "darksky")
+
+    replaced = []
+
+    def failing_replace(src, dst):
+        replaced.append((src, dst))
+        raise OSError("disk full")
+
+    # The new cache is written to a temporary file first, so failing to
+    # move it into place leaves the old one untouched.
+    monkeypatch.setattr(forecast_cache.os, "replace", failing_replace)
+    cache.save({"changed": True}, 2, "darksky")
+
+    assert replaced == [(f"{cache_file}.tmp", cache_file)]
+    entry = cache.load("darksky")
+    assert entry["fetched_at"] == 1
+    assert entry["data"] == darksky_response
+
+
+def start_weather(directory, fetched_at, darksky_response, **settings):
+    """
+    Creates a headless Weather that starts from a cache of the recorded
+    response fetched at fetched_at, without touching the network. Any
+    settings are added to the sample config.
+    """
+    from piweatherrock.weather import Weather
+
+    with open(SAMPLE_CONFIG, "r") as f:
+        config = json.load(f)
+    config.update(headless=True, log_level="WARNING", update_freq=300)
+    config.update(settings)
+    config_file = directory / "config.json"
+    config_file.write_text(json.dumps(config))
+
+    ForecastCache(str(directory / ".forecast_cache.json.gz")).save(
+        darksky_response, fetched_at, "darksky", etag='"abc"')
+    return Weather(str(config_file), fetch=False)
+
+
+@pytest.mark.parametrize("age, stale", [(60, False), (301, True)])
+def test_warm_start_from_cache(tmp_path, monkeypatch, darksky_response,
+                               age, stale):
+    pytest.importorskip("pygame")
+    monkeypatch.chdir(tmp_path)
+    fetched_at = time.time() - age
+    weather_rock = start_weather(tmp_path, fetched_at, darksky_response)
+    try:
+        assert weather_rock.forecast_version == 1
+        assert weather_rock.snapshot.from_cache
+        assert weather_rock.last_update_check == fetched_at
+        assert weather_rock.provider.etag == '"abc"'
+        assert weather_rock.is_stale() is stale
+    finally:
+        weather_rock.stop_fetcher()
+
+
+@pytest.mark.parametrize("age, stale", [(60, False), (301, True)])
+def test_shared_forecast_goes_stale(tmp_path, monkeypatch, darksky_response,
+                                    age, stale):
+    pytest.importorskip("pygame")
+    monkeypatch.chdir(tmp_path)
+    shared = str(tmp_path / "forecast.shm")
+    reader_dir = tmp_path / "reader"
+    reader_dir.mkdir()
+    # The writer shares what it loads from its cache
+    writer = start_weather(tmp_path, time.time() - age, darksky_response,
+                           shared_forecast=shared)
+    reader = start_weather(reader_dir, 0, darksky_response,
+                           shared_forecast=shared,
+                           shared_forecast_mode="read")
+    try:
+        assert reader.read_shared_forecast()
+        assert not reader.snapshot.from_cache
+        assert reader.is_stale() is stale
+    finally:
+        reader.stop_fetcher()
+        writer.stop_fetcher()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import gzip
+import json
+import os
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from piweatherrock.forecast_client import ForecastClient  # noqa: E402
+
+EXAMPLE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example")
+ETAG = '"forecast-1"'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Plays Dark Sky: answers with the recorded response, gzipped when
+    asked, and 304 when the client already has it. Statuses queued in
+    server.failures are sent first, one per request.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append({
+            "path": self.path,
+            "port": self.client_address[1],
+            "headers": dict(self.headers),
+        })
+
+        if self.server.failures:
+            self.send_body(self.server.failures.pop(0), b'{"error": 1}')
+        elif self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_body(200, self.server.body, ETAG)
+
+    def send_body(self, status, body, etag=None):
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def darksky_response():
+    with open(os.path.join(EXAMPLE_DIR, "darksky_forecast.json"), "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def stub(darksky_response):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.failures = []
+    server.body = json.dumps(darksky_response).encode("utf-8")
+    threading.Thread(target=server.serve_forever, args=(0.05,),
+                     daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub):
+    forecast_client = ForecastClient(
+        "KEY", base_url=f"http://127.0.0.1:{stub.server_port}/forecast",
+        backoff=0)
+    yield forecast_client
+    forecast_client.close()
+
+
+def test_fetch_decodes_gzipped_response(stub, client, darksky_response):
+    assert client.fetch(1.5, 2.5, units="us") == darksky_response
+
+    request = stub.requests[0]
+    assert request["path"] == "/forecast/KEY/1.5,2.5?units=us"
+    assert "gzip" in request["headers"]["Accept-Encoding"]
+    # What came over the wire is the compressed size
+    assert client.bytes_received == len(gzip.compress(stub.body))
+    assert client.bytes_received < len(stub.body)
+    assert client.etag == ETAG
+
+
+def test_connection_is_reused(stub, client):
+    for _ in range(3):
+        client.fetch(1, 2)
+
+    assert len(stub.requests) == 3
+    assert len({request["port"] for request in stub.requests}) == 1
+
+
+def test_unchanged_forecast_is_not_downloaded_again(stub, client,
+                                                    darksky_response):
+    client.fetch(1, 2)
+    assert client.fetch(1, 2) == darksky_response
+
+    assert "If-None-Match" not in stub.requests[0]["headers"]
+    assert stub.requests[1]["headers"]["If-None-Match"] == ETAG
+
+
+def test_remembered_response_makes_first_request_conditional(
+        stub, client, darksky_response):
+    client.remember(darksky_response, etag=ETAG)
+    assert client.fetch(1, 2) == darksky_response
+    assert stub.requests[0]["headers"]["If-None-Match"] == ETAG
+
+
+@pytest.mark.parametrize("failures", [[503], [500, 502], [429]])
+def test_server_errors_are_retried(stub, client, darksky_response,
+                                   failures):
+    stub.failures = list(failures)
+    assert client.fetch(1, 2) == darksky_response
+    assert client.retry_count == len(failures)
+    assert len(stub.requests) == len(failures) + 1
+
+
+def test_gives_up_after_retries(stub, client):
+    stub.failures = [503] * 10
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.fetch(1, 2)
+    assert len(stub.requests) == client.retries + 1
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+def test_client_errors_are_not_retried(stub, client, status):
+    stub.failures = [status]
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.fetch(1, 2)
+    assert len(stub.requests) == 1
+
+
+def test_connection_errors_are_retried(stub, monkeypatch):
+    port = stub.server_port
+    stub.shutdown()
+    stub.server_close()
+    forecast_client = ForecastClient(
+        "KEY", base_url=f"http://127.0.0.1:{port}/forecast", backoff=0,
+        retries=2)
+    calls = []
+    get = forecast_client.session.get
+
+    def counting_get(*args, **kwargs):
+        calls.append(args)
+        return get(*args, **kwargs)
+
+    monkeypatch.setattr(forecast_client.session, "get", counting_get)
+    try:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            forecast_client.fetch(1, 2)
+    finally:
+        forecast_client.close()
+    assert len(calls) == 3
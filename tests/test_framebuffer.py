@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import struct
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from piweatherrock.framebuffer import Framebuffer  # noqa: E402
+
+SIZE = (8, 6)
+# Left over from before, and never written outside the dirty rect
+SENTINEL = 0xAA
+COLOR = (255, 128, 16)
+
+
+def pixel(data, stride, bytes_per_pixel, x, y):
+    offset = y * stride + x * bytes_per_pixel
+    return data[offset:offset + bytes_per_pixel]
+
+
+@pytest.mark.parametrize("bpp, stride, expected", [
+    # RGB565: 11111 100000 00010, little endian
+    (16, 16, struct.pack("<H", 0xFC02)),
+    # XRGB8888 is stored blue, green, red, then the unused byte. The rows
+    # are padded past the visible width.
+    (32, 40, bytes([16, 128, 255])),
+])
+def test_dirty_rect_is_converted_in_place(tmp_path, bpp, stride, expected):
+    device = tmp_path / "fb0"
+    length = stride * SIZE[1]
+    device.write_bytes(bytes([SENTINEL]) * length)
+
+    surface = pygame.Surface(SIZE, 0, 32)
+    surface.fill((0, 0, 255))
+    rect = pygame.Rect(2, 1, 3, 2)
+    surface.fill(COLOR, rect)
+
+    framebuffer = Framebuffer(str(device), SIZE, bpp, stride)
+    try:
+        framebuffer.write(surface, [rect])
+    finally:
+        framebuffer.close()
+
+    data = device.read_bytes()
+    assert len(data) == length
+    bytes_per_pixel = bpp // 8
+    for y in range(SIZE[1]):
+        for x in range(SIZE[0]):
+            value = pixel(data, stride, bytes_per_pixel, x, y)
+            if rect.collidepoint(x, y):
+                assert value[:len(expected)] == expected, (x, y)
+            else:
+                assert value == bytes([SENTINEL]) * bytes_per_pixel, (x, y)
+    # Nor is the padding at the end of each row
+    padding = stride - SIZE[0] * bytes_per_pixel
+    for y in range(SIZE[1]):
+        end = (y + 1) * stride
+        assert data[end - padding:end] == bytes([SENTINEL]) * padding
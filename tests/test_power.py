@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import time
+
+import pytest
+
+from piweatherrock import GPIOmock
+from piweatherrock.forecast import Series
+from piweatherrock.power import (
+    PowerLevel, PowerManager, PowerSchedule, PwmBacklight, SysfsBacklight)
+
+DAY = PowerLevel('day', 100, 1, False)
+NIGHT = PowerLevel('night', 40, 5, False)
+QUIET = PowerLevel('quiet', 0, 60, True)
+
+
+def local_time(hour, minute=0):
+    """
+    Returns the timestamp for hour:minute local time on a fixed day.
+    """
+    return time.mktime((2020, 5, 13, hour, minute, 0, 0, 0, -1))
+
+
+@pytest.fixture
+def daily():
+    """
+    One day with sunrise at 06:30 and sunset at 20:00.
+    """
+    series = Series()
+    series.append(local_time(0), sunrise_time=local_time(6, 30),
+                  sunset_time=local_time(20))
+    return series
+
+
+@pytest.mark.parametrize("hour, minute, level", [
+    (12, 0, DAY),
+    (6, 30, DAY),
+    (6, 29, NIGHT),
+    (20, 0, NIGHT),
+    (22, 59, NIGHT),
+])
+def test_day_and_night_follow_the_sun(daily, hour, minute, level):
+    schedule = PowerSchedule(DAY, NIGHT)
+    assert schedule.level(local_time(hour, minute), daily) == level
+
+
+def test_without_a_forecast_it_is_always_day():
+    schedule = PowerSchedule(DAY, NIGHT)
+    assert schedule.level(local_time(2)) == DAY
+    assert schedule.level(local_time(2), Series()) == DAY
+
+
+@pytest.mark.parametrize("hour, minute, level", [
+    (22, 59, NIGHT),
+    (23, 0, QUIET),
+    (0, 0, QUIET),
+    (5, 59, QUIET),
+    (6, 0, NIGHT),
+    (12, 0, DAY),
+])
+def test_quiet_hours_wrap_past_midnight(daily, hour, minute, level):
+    schedule = PowerSchedule(DAY, NIGHT, QUIET, "23:00", "06:00")
+    assert schedule.level(local_time(hour, minute), daily) == level
+
+
+def test_quiet_hours_within_a_day():
+    schedule = PowerSchedule(DAY, NIGHT, QUIET, "13:00", "14:30")
+    assert not schedule.is_quiet(local_time(12, 59))
+    assert schedule.is_quiet(local_time(13))
+    assert schedule.is_quiet(local_time(14, 29))
+    assert not schedule.is_quiet(local_time(14, 30))
+
+
+def test_wake_shows_day_for_wake_seconds(daily):
+    manager = PowerManager(PowerSchedule(DAY, NIGHT, QUIET, "23:00", "06:00"),
+                           wake=30)
+    now = local_time(2)
+    assert manager.update(now, daily) == (QUIET, True)
+
+    manager.wake(now)
+    assert manager.update(now + 29, daily) == (DAY, True)
+    assert manager.update(now + 30, daily) == (QUIET, True)
+    assert manager.update(now + 31, daily) == (QUIET, False)
+
+
+def test_pwm_duty_cycle_is_set_through_gpio(daily, capsys):
+    backlight = PwmBacklight(18, gpio=GPIOmock)
+    manager = PowerManager(PowerSchedule(DAY, NIGHT), backlight=backlight)
+    capsys.readouterr()
+
+    manager.update(local_time(22), daily)
+    assert capsys.readouterr().out == (
+        "Set pulse-width modulation to 40 for channel 18\n")
+
+    manager.close()
+    assert "channel 18" in capsys.readouterr().out
+
+
+def test_sysfs_backlight_is_scaled_to_max_brightness(tmp_path, daily):
+    (tmp_path / "max_brightness").write_text("255\n")
+    backlight = SysfsBacklight(str(tmp_path))
+    manager = PowerManager(PowerSchedule(DAY, NIGHT, QUIET, "23:00", "06:00"),
+                           backlight=backlight)
+
+    manager.update(local_time(22), daily)
+    assert (tmp_path / "brightness").read_text() == "102"
+    manager.update(local_time(23), daily)
+    assert (tmp_path / "brightness").read_text() == "0"
+    manager.update(local_time(12), daily)
+    assert (tmp_path / "brightness").read_text() == "255"
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import json
+import os
+
+import pytest
+
+from piweatherrock.providers.replay import rebase
+
+EXAMPLE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example")
+
+
+@pytest.fixture
+def darksky_response():
+    with open(os.path.join(EXAMPLE_DIR, "darksky_forecast.json"), "r") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("hours_later", [0, 7, 17, 24 * 400 + 5])
+def test_replay_lines_up_with_now(darksky_response, hours_later):
+    recorded = darksky_response["hourly"]["data"][0]["time"]
+    first_day = darksky_response["daily"]["data"][0]["time"]
+    now = recorded + hours_later * 3600 + 1234
+    payload = rebase(darksky_response, now)
+
+    hourly = payload["hourly"]["data"]
+    assert hourly[0]["time"] == now // 3600 * 3600
+    assert hourly[1]["time"] - hourly[0]["time"] == 3600
+    assert payload["currently"]["time"] - hourly[0]["time"] < 3600
+
+    # Days move by whole days only, so they keep starting at midnight
+    daily = payload["daily"]["data"]
+    assert (daily[0]["time"] - first_day) % 86400 == 0
+    assert daily[0]["time"] <= now < daily[0]["time"] + 86400
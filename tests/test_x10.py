@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2020 Gene Liverman <gene@technicalissues.us>
+# Distributed under the MIT License (https://opensource.org/licenses/MIT)
+
+import os
+import threading
+import tty
+
+import pytest
+
+serial = pytest.importorskip("serial")
+
+from piweatherrock import X10  # noqa: E402
+
+
+class FakeCM11A(threading.Thread):
+    """
+    Answers like a CM11A on the other end of a pty.
+
+    Replies to packets can be held back with the gate to let commands
+    pile up, spoiled with bad_checksums, or withheld altogether with
+    silent.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        (self.master, self.slave) = os.openpty()
+        tty.setraw(self.master)
+        self.port = os.ttyname(self.slave)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.bad_checksums = 0
+        self.silent = False
+        self.received = []
+        self.acked = []
+        self.awaiting_ack = None
+        self.upload = b"\x02\x00\x66"
+
+    def read(self, count):
+        data = b""
+        while len(data) < count:
+            data += os.read(self.master, count - len(data))
+        return data
+
+    def reply(self, data):
+        os.write(self.master, data)
+
+    def run(self):
+        try:
+            while True:
+                self.handle(self.read(1))
+        except OSError:
+            # Closed
+            return
+
+    def handle(self, byte):
+        if self.silent:
+            return
+        if byte == bytes([X10.STATUS_REQUEST]):
+            self.reply(bytes(range(14)))
+        elif byte == bytes([X10.POLL_REPLY]):
+            self.reply(bytes([len(self.upload)]) + self.upload)
+        elif byte == bytes([X10.ACK]):
+            if self.awaiting_ack is not None:
+                self.acked.append(self.awaiting_ack)
+                self.awaiting_ack = None
+                self.reply(bytes([X10.READY]))
+        else:
+            if byte == X10.SET_CLOCK[:1]:
+                packet = byte + self.read(len(X10.SET_CLOCK) - 1)
+                expected = X10.checksum(packet[1:])
+            else:
+                packet = byte + self.read(1)
+                expected = X10.checksum(packet)
+            self.received.append(packet)
+            self.gate.wait()
+            if self.bad_checksums:
+                self.bad_checksums -= 1
+                expected ^= 0xFF
+            self.awaiting_ack = packet
+            self.reply(bytes([expected]))
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+@pytest.fixture
+def fake():
+    cm11a = FakeCM11A()
+    cm11a.start()
+    yield cm11a
+    cm11a.close()
+
+
+def start_controller(fake, timeout=2, **kwargs):
+    controller = X10.X10Controller(
+        serial=serial.Serial(fake.port, 4800, timeout=timeout), **kwargs)
+    controller.start()
+    return controller
+
+
+@pytest.fixture
+def controller(fake):
+    x10 = start_controller(fake)
+    yield x10
+    x10.stop()
+    x10.join(2)
+    x10.serial.close()
+
+
+def packets(house, unit, header, function):
+    (house_code, unit_code) = X10.X10Controller.address(house, unit)
+    return [bytes([X10.addr, (house_code << 4) | unit_code]),
+            bytes([header, (house_code << 4) | X10.funccode[function]])]
+
+
+def test_on_sends_address_then_function(fake, controller):
+    assert controller.on('A', 1).result(2) is True
+    assert fake.acked == packets('A', 1, X10.func, 'On')
+
+
+def test_status_returns_fourteen_bytes(controller):
+    assert controller.status().result(2) == bytes(range(14))
+
+
+def test_waiting_commands_are_combined(fake, controller):
+    # Hold the first command in flight so the rest pile up behind it
+    fake.gate.clear()
+    first = controller.on('B', 2)
+    while not fake.received:
+        threading.Event().wait(0.01)
+
+    futures = [controller.bright('A', 1) for _ in range(10)]
+    futures.append(controller.dim('A', 1, 3))
+    futures += [controller.on('C', 3), controller.off('C', 3)]
+    futures += [controller.bright('D', 4), controller.dim('D', 4)]
+    futures += [controller.status(), controller.status()]
+    fake.gate.set()
+
+    assert first.result(2) is True
+    for future in futures:
+        assert future.result(2)
+    assert fake.acked == (
+        packets('B', 2, X10.func, 'On') +
+        packets('A', 1, (7 << 3) | X10.func, 'Bright') +
+        packets('C', 3, X10.func, 'Off'))
+    # B2 on, A1 bright, C3 off and one status read
+    assert controller.sent == 4
+
+
+def test_steps_are_capped_at_full_range(fake, controller):
+    fake.gate.clear()
+    controller.on('A', 1)
+    while not fake.received:
+        threading.Event().wait(0.01)
+    dim = controller.dim('A', 2, 30)
+    fake.gate.set()
+
+    assert dim.result(2) is True
+    assert fake.acked[-2:] == packets(
+        'A', 2, (X10.MAX_DIMS << 3) | X10.func, 'Dim')
+
+
+def test_poll_is_answered_and_handed_over(fake):
+    received = []
+    got_it = threading.Event()
+
+    def on_receive(data):
+        received.append(data)
+        got_it.set()
+
+    controller = start_controller(fake, on_receive=on_receive)
+    try:
+        fake.reply(bytes([X10.POLL]))
+        assert got_it.wait(2)
+        assert received == [fake.upload]
+    finally:
+        controller.stop()
+        controller.join(2)
+
+
+def test_clock_request_sets_clock_once(fake, controller):
+    # It keeps asking until it is answered
+    fake.reply(bytes([X10.CLOCK_REQUEST, X10.CLOCK_REQUEST]))
+    assert controller.on('A', 1).result(2) is True
+    assert fake.acked[0] == X10.SET_CLOCK
+    assert fake.acked.count(X10.SET_CLOCK) == 1
+
+
+def test_failed_clock_request_while_idle_is_survived(fake, controller):
+    fake.bad_checksums = X10.RETRIES
+    fake.reply(bytes([X10.CLOCK_REQUEST]))
+    while fake.received.count(X10.SET_CLOCK) < X10.RETRIES:
+        threading.Event().wait(0.01)
+
+    assert controller.on('A', 1).result(2) is True
+    assert controller.is_alive()
+    assert X10.SET_CLOCK not in fake.acked
+    assert fake.acked == packets('A', 1, X10.func, 'On')
+
+
+def test_failing_receive_callback_is_survived(fake):
+    received = []
+    got_it = threading.Event()
+
+    def on_receive(data):
+        received.append(data)
+        got_it.set()
+        raise ValueError("Unexpected upload")
+
+    controller = start_controller(fake, on_receive=on_receive)
+    try:
+        for _ in range(2):
+            got_it.clear()
+            fake.reply(bytes([X10.POLL]))
+            assert got_it.wait(2)
+        assert received == [fake.upload] * 2
+        assert controller.is_alive()
+    finally:
+        controller.stop()
+        controller.join(2)
+
+
+def test_bad_checksum_is_retried(fake, controller):
+    fake.bad_checksums = 1
+    assert controller.off('A', 1).result(2) is True
+    off = packets('A', 1, X10.func, 'Off')
+    assert fake.received == [off[0]] + off
+    assert fake.acked == off
+
+
+def test_cancelled_commands_are_skipped(fake, controller):
+    fake.gate.clear()
+    first = controller.on('E', 1)
+    while not fake.received:
+        threading.Event().wait(0.01)
+    cancelled = controller.on('F', 1)
+    assert cancelled.cancel()
+    fake.gate.set()
+
+    assert first.result(2) is True
+    assert controller.status().result(2)
+    assert fake.acked == packets('E', 1, X10.func, 'On')
+
+
+def test_no_answer_raises(fake):
+    fake.silent = True
+    controller = start_controller(fake, timeout=0.1)
+    try:
+        with pytest.raises(X10.X10Error):
+            controller.on('A', 1).result(5)
+        with pytest.raises(X10.X10Error):
+            controller.status().result(5)
+    finally:
+        controller.stop()
+        controller.join(2)
+
+
+def test_stopping_fails_new_commands(controller):
+    controller.stop()
+    controller.join(2)
+    with pytest.raises(X10.X10Error):
+        controller.on('A', 1).result(1)